@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+ModuKit - 批处理执行器
+以非交互方式执行命令，支持管道和并发执行
+"""
+
+import sys
+import json
+import shlex
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+def parse_pipeline(line):
+    """将一行命令解析为管道阶段列表
+
+    Args:
+        line: 命令行文本，例如 "use a x | use b"
+
+    Returns:
+        list: 每个阶段的参数列表
+    """
+    lexer = shlex.shlex(line, posix=True, punctuation_chars='|')
+    lexer.whitespace_split = True
+
+    stages = [[]]
+    for token in lexer:
+        # 连续的 '|' 会被合并为一个标记（如 '||'），每个 '|' 都是一个阶段分隔符
+        if token and token.strip('|') == '':
+            stages.extend([] for _ in token)
+        else:
+            stages[-1].append(token)
+
+    if any(not stage for stage in stages):
+        raise ValueError(f"管道语法错误: {line}")
+
+    return stages
+
+def read_script(path):
+    """读取命令脚本
+
+    Args:
+        path: 脚本文件路径，'-' 表示从标准输入读取
+
+    Returns:
+        list: 命令列表（已去除空行和注释行）
+    """
+    if path == '-':
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+
+    return [line.strip() for line in lines
+            if line.strip() and not line.strip().startswith('#')]
+
+def format_record(record):
+    """将输出记录格式化为一行文本"""
+    if isinstance(record, str):
+        return record
+    if isinstance(record, bytes):
+        return record.decode('utf-8', errors='replace')
+    return json.dumps(record, ensure_ascii=False, default=str)
+
+class _OutputMux:
+    """输出复用器，按线程为输出添加任务前缀并保证整行写出"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def bind(self, prefix):
+        """将当前线程绑定到指定前缀"""
+        self.local.prefix = prefix
+        self.local.buffer = ''
+
+    def unbind(self):
+        """解除当前线程的绑定，并写出剩余的不完整行"""
+        if getattr(self.local, 'buffer', ''):
+            self._emit(self.local.prefix, [self.local.buffer])
+        self.local.prefix = None
+        self.local.buffer = ''
+
+    def write(self, text):
+        prefix = getattr(self.local, 'prefix', None)
+        if prefix is None:
+            with self.lock:
+                return self.stream.write(text)
+
+        self.local.buffer += text
+        *lines, self.local.buffer = self.local.buffer.split('\n')
+        if lines:
+            self._emit(prefix, lines)
+        return len(text)
+
+    def _emit(self, prefix, lines):
+        with self.lock:
+            for line in lines:
+                self.stream.write(f"{prefix}{line}\n")
+            self.stream.flush()
+
+    def flush(self):
+        with self.lock:
+            self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+class BatchRunner:
+    """批处理执行器
+
+    每条命令可以由多个以 '|' 连接的阶段组成，上一阶段输出的记录
+    以生成器形式流式传入下一阶段。多条命令可以并发执行，输出按行复用。
+    """
+
+    def __init__(self, execute, jobs=1, stop_on_error=False):
+        """初始化批处理执行器
+
+        Args:
+            execute: 命令执行函数，签名为 execute(argv, records)，
+                返回可迭代的输出记录或None
+            jobs: 并发执行的命令数
+            stop_on_error: 顺序执行时遇到错误是否立即停止
+        """
+        self.execute = execute
+        self.jobs = max(1, int(jobs))
+        self.stop_on_error = stop_on_error
+
+    def run(self, commands):
+        """执行命令列表
+
+        Args:
+            commands: 命令文本列表
+
+        Returns:
+            int: 失败的命令数
+        """
+        mux = _OutputMux(sys.stdout)
+        original_stdout = sys.stdout
+        sys.stdout = mux
+
+        try:
+            if self.jobs == 1:
+                failed = 0
+                for index, command in enumerate(commands, 1):
+                    if not self._run_one(mux, index, command):
+                        failed += 1
+                        if self.stop_on_error:
+                            break
+                return failed
+
+            with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+                results = executor.map(
+                    lambda item: self._run_one(mux, *item),
+                    enumerate(commands, 1)
+                )
+                return sum(1 for ok in results if not ok)
+        finally:
+            sys.stdout = original_stdout
+
+    def _run_one(self, mux, index, command):
+        """执行单条命令（可能包含管道）"""
+        prefix = f"[{index}] " if self.jobs > 1 else ''
+        mux.bind(prefix)
+
+        try:
+            records = None
+            for argv in parse_pipeline(command):
+                records = self.execute(argv, records)
+
+            if records is not None:
+                for record in records:
+                    print(format_record(record))
+            return True
+        except Exception as e:
+            mux.unbind()
+            with mux.lock:
+                sys.stderr.write(f"{prefix}命令执行失败: {command}: {e}\n")
+                sys.stderr.flush()
+            return False
+        finally:
+            mux.unbind()
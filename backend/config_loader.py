@@ -55,8 +55,7 @@ class ConfigLoader:
     def _load_json_config(self):
         """加载JSON格式配置文件"""
         try:
-            with open(self.config_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return self._parse_json_config()
         except Exception as e:
             print(f"加载JSON配置文件失败: {e}")
             return self._create_default_config()
@@ -64,21 +63,33 @@ class ConfigLoader:
     def _load_ini_config(self):
         """加载INI格式配置文件"""
         try:
-            config = configparser.ConfigParser()
-            config.read(self.config_path, encoding='utf-8')
-            
-            # 将ConfigParser对象转换为字典
-            result = {}
-            for section in config.sections():
-                result[section] = {}
-                for key, value in config[section].items():
-                    result[section][key] = value
-                    
-            return result
+            return self._parse_ini_config()
         except Exception as e:
             print(f"加载INI配置文件失败: {e}")
             return self._create_default_config()
             
+    def _parse_json_config(self):
+        """解析JSON格式配置文件，失败时抛出异常"""
+        with open(self.config_path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        if not isinstance(config, dict):
+            raise ValueError("配置文件内容必须是JSON对象")
+        return config
+        
+    def _parse_ini_config(self):
+        """解析INI格式配置文件，失败时抛出异常"""
+        config = configparser.ConfigParser()
+        config.read(self.config_path, encoding='utf-8')
+        
+        # 将ConfigParser对象转换为字典
+        result = {}
+        for section in config.sections():
+            result[section] = {}
+            for key, value in config[section].items():
+                result[section][key] = value
+                
+        return result
+        
     def _create_default_config(self):
         """创建默认配置"""
         default_config = {
@@ -179,6 +190,46 @@ class ConfigLoader:
         """
         return self.config.get(section, default)
         
+    def reload(self):
+        """重新读取配置文件
+        
+        在原字典上更新，已通过 get_config() 获取的配置字典会同步变化；
+        文件无法解析时保留当前配置
+        
+        Returns:
+            dict: 配置字典
+        """
+        # 只解析文件，解析失败时保留当前配置，不写入默认配置
+        try:
+            if self.config_path.suffix.lower() == '.json':
+                config = self._parse_json_config()
+            elif self.config_path.suffix.lower() == '.ini':
+                config = self._parse_ini_config()
+            else:
+                raise ValueError(f"不支持的配置文件格式: {self.config_path.suffix}")
+        except Exception as e:
+            print(f"重新加载配置文件失败，继续使用当前配置: {e}")
+            return self.config
+            
+        self.config.clear()
+        self.config.update(config)
+        return self.config
+        
+    def watch(self, watcher, callback=None):
+        """监视配置文件，文件变化时自动重新加载
+        
+        Args:
+            watcher: 文件系统监视器
+            callback: 重新加载后调用的函数，参数为配置字典
+        """
+        def on_change(changes):
+            if any(event != 'deleted' for event, _ in changes):
+                config = self.reload()
+                if callback is not None:
+                    callback(config)
+                    
+        watcher.watch(self.config_path, on_change, replay=False)
+        
     def get_config(self):
         """获取整个配置
         
@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+ModuKit - 文件存储
+为模块文件的上传下载提供分块写入和断点续传支持
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+# 获取项目根目录
+ROOT_DIR = Path(__file__).parent.parent.absolute()
+
+# 每次从请求体读取的字节数
+CHUNK_SIZE = 1024 * 1024
+
+class UploadOffsetError(Exception):
+    """上传偏移与已接收的数据量不一致"""
+
+    def __init__(self, received):
+        super().__init__(f"上传偏移不一致，已接收 {received} 字节")
+        self.received = received
+
+class FileStore:
+    """文件存储类
+
+    已完成的文件保存在存储目录中，上传中的文件保存在 .partial 子目录，
+    接收完全部数据后再移动到存储目录，避免下载到不完整的文件。
+    """
+
+    def __init__(self, root=None):
+        """初始化文件存储
+
+        Args:
+            root: 存储目录，默认为 data/files
+        """
+        self.root = Path(root) if root else ROOT_DIR / "data" / "files"
+        self.partial_dir = self.root / ".partial"
+        os.makedirs(self.partial_dir, exist_ok=True)
+
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+
+    @contextmanager
+    def _locked(self, name):
+        """串行化对同一文件的写入，不再使用的锁会被移除"""
+        with self._locks_lock:
+            entry = self._locks.setdefault(name, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._locks_lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._locks[name]
+
+    def _check_name(self, name):
+        """检查文件名，不允许包含路径"""
+        if (not name or name.startswith('.') or '/' in name or '\\' in name
+                or '\x00' in name):
+            raise ValueError(f"无效的文件名: {name}")
+        return name
+
+    def path(self, name):
+        """获取已完成文件的路径"""
+        return self.root / self._check_name(name)
+
+    def partial_path(self, name):
+        """获取上传中文件的路径"""
+        return self.partial_dir / self._check_name(name)
+
+    def received(self, name):
+        """获取上传中文件已接收的字节数"""
+        try:
+            return self.partial_path(name).stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    def write_stream(self, name, stream, offset=0, total=None, ranged=False, length=None):
+        """将输入流分块写入文件
+
+        同一文件的写入按顺序执行。本次数据长度与 length 不一致，或写入后超过
+        total 时，丢弃本次写入的数据并抛出 ValueError。
+
+        Args:
+            name: 文件名
+            stream: 可读的输入流
+            offset: 本次数据在文件中的起始位置，必须等于已接收的字节数；
+                为0时丢弃之前未完成的上传，重新开始
+            total: 文件总大小，为None表示未知
+            ranged: 是否为分段上传的一段。不是分段上传时本次数据即为完整文件；
+                分段上传且总大小未知时，需要等待带有总大小的后续分段才会完成
+            length: 本次数据的声明长度，为None时不检查
+
+        Returns:
+            tuple: (已接收字节数, 是否已完成)
+
+        Raises:
+            UploadOffsetError: 偏移与已接收的数据量不一致
+            ValueError: 文件名无效，或数据长度与声明不符
+        """
+        partial = self.partial_path(name)
+        limit = None
+        if length is not None:
+            limit = offset + length
+        if total is not None:
+            limit = total if limit is None else min(limit, total)
+
+        with self._locked(name):
+            received = self.received(name)
+            if offset and offset != received:
+                raise UploadOffsetError(received)
+
+            mode = 'r+b' if offset else 'wb'
+            with open(partial, mode) as f:
+                f.seek(offset)
+                f.truncate()
+                while True:
+                    chunk = stream.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    if limit is not None and f.tell() + len(chunk) > limit:
+                        f.truncate(offset)
+                        raise ValueError(f"数据超出声明的长度，上传偏移 {offset}")
+                    f.write(chunk)
+                received = f.tell()
+
+                if length is not None and received - offset != length:
+                    f.truncate(offset)
+                    raise ValueError(f"数据长度 {received - offset} 与声明的 {length} 不一致")
+
+            if total is not None:
+                complete = received >= total
+            else:
+                complete = not ranged
+            if complete:
+                os.replace(partial, self.path(name))
+        return received, complete
+
+    def list_files(self):
+        """列出已完成的文件
+
+        Returns:
+            list: 文件名和大小
+        """
+        return [
+            {'name': entry.name, 'size': entry.stat().st_size}
+            for entry in sorted(self.root.iterdir())
+            if entry.is_file() and not entry.name.startswith('.')
+        ]
+
+    def delete(self, name):
+        """删除文件及其未完成的上传
+
+        Returns:
+            bool: 是否删除了文件
+        """
+        deleted = False
+        paths = (self.path(name), self.partial_path(name))
+        with self._locked(name):
+            for path in paths:
+                try:
+                    path.unlink()
+                    deleted = True
+                except FileNotFoundError:
+                    pass
+        return deleted
@@ -0,0 +1,677 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+ModuKit - 文件系统监视服务
+基于inotify监视目录变化（不支持时回退到轮询），合并短时间内的连续事件后
+批量通知订阅者，并保存检查点以便在启动时补发程序关闭期间发生的变化
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import errno
+import atexit
+import select
+import struct
+import ctypes
+import ctypes.util
+import threading
+from pathlib import Path
+
+# 获取项目根目录
+ROOT_DIR = Path(__file__).parent.parent.absolute()
+
+# 事件类型
+CREATED = 'created'
+MODIFIED = 'modified'
+DELETED = 'deleted'
+
+# inotify常量，见 <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+              | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+
+EVENT_HEADER = struct.Struct('iIII')
+
+class _Inotify:
+    """inotify的ctypes封装"""
+
+    def __init__(self):
+        if not sys.platform.startswith('linux'):
+            raise OSError(errno.ENOSYS, "当前系统不支持inotify")
+
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+
+        self.watches = {}
+
+    def add(self, path):
+        """为目录添加监视"""
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), path)
+        self.watches[wd] = path
+
+    def read(self):
+        """读取所有待处理的事件
+
+        Returns:
+            list: (mask, 路径) 列表
+        """
+        events = []
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return events
+
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b'\0')
+                offset += length
+
+                directory = self.watches.get(wd)
+                if mask & IN_IGNORED:
+                    self.watches.pop(wd, None)
+                if mask & IN_Q_OVERFLOW:
+                    events.append((mask, None))
+                elif directory is not None:
+                    path = os.path.join(directory, os.fsdecode(name)) if name else directory
+                    events.append((mask, path))
+
+    def close(self):
+        os.close(self.fd)
+
+class _Subscription:
+    """订阅记录"""
+
+    __slots__ = ('path', 'is_file', 'recursive', 'callback', 'replay')
+
+    def __init__(self, path, is_file, recursive, callback, replay):
+        self.path = path
+        self.is_file = is_file
+        self.recursive = recursive
+        self.callback = callback
+        self.replay = replay
+
+    def matches(self, path):
+        if self.is_file:
+            return path == self.path
+        if self.recursive:
+            return path.startswith(self.path + os.sep)
+        return os.path.dirname(path) == self.path
+
+def _is_under(path, root, recursive):
+    """判断路径是否位于监视根目录之下"""
+    if recursive:
+        return path.startswith(root + os.sep)
+    return os.path.dirname(path) == root
+
+class FileWatcher:
+    """文件系统监视器
+
+    维护被监视文件的 (修改时间, 大小) 快照。收到inotify事件或轮询时只重新检查
+    发生变化的路径，与快照比较后生成 created/modified/deleted 事件。
+    事件在 debounce 秒内没有新变化（或累计超过 max_delay 秒）时批量分发。
+
+    快照另按所在目录建立索引，目录被删除时只需查找该目录下的记录。检查点平时以
+    追加日志的方式只写入变化的条目，日志过长、添加根目录或停止时再写入完整快照。
+    """
+
+    def __init__(self, checkpoint_path=None, debounce=0.5, max_delay=5.0,
+                 poll_interval=2.0, use_inotify=True, checkpoint_interval=10.0):
+        """初始化文件系统监视器
+
+        Args:
+            checkpoint_path: 检查点文件路径，默认为 data/watch_checkpoint.json，
+                为False时不保存检查点
+            debounce: 合并事件的静默时间（秒）
+            max_delay: 事件从产生到分发的最长等待时间（秒）
+            poll_interval: 轮询模式下的扫描间隔（秒）
+            use_inotify: 是否尝试使用inotify
+            checkpoint_interval: 保存检查点的最小间隔（秒）
+        """
+        if checkpoint_path is None:
+            checkpoint_path = ROOT_DIR / "data" / "watch_checkpoint.json"
+        self.checkpoint_path = Path(checkpoint_path) if checkpoint_path else None
+        self.journal_path = (self.checkpoint_path.with_name(self.checkpoint_path.name + '.log')
+                             if self.checkpoint_path else None)
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        self.checkpoint_interval = checkpoint_interval
+
+        self._lock = threading.RLock()
+        self._subscriptions = []
+        self._roots = {}
+        self._polled_roots = set()
+        self._watch_limit_reported = False
+        self._snapshot = {}
+        self._children = {}
+        self._checkpoint = self._load_checkpoint()
+        self._pending = {}
+        self._first_event = None
+        self._last_event = None
+        self._last_save = time.monotonic()
+        self._changed = {}
+        self._journal_entries = 0
+        self._full_save = False
+
+        self._inotify = None
+        self._thread = None
+        self._batches = queue.Queue()
+        self._dispatcher = None
+        self._stop_event = threading.Event()
+
+    def configure(self, **options):
+        """修改监视参数
+
+        debounce、max_delay、poll_interval 和 checkpoint_interval 随时生效；
+        use_inotify 和 checkpoint_path 只能在启动前修改，启动后修改会被忽略并输出警告。
+        """
+        for name in ('debounce', 'max_delay', 'poll_interval', 'checkpoint_interval'):
+            if name in options:
+                setattr(self, name, options.pop(name))
+
+        ignored = []
+        if 'use_inotify' in options:
+            use_inotify = options.pop('use_inotify')
+            if self._thread is None:
+                self.use_inotify = use_inotify
+            elif use_inotify != self.use_inotify:
+                ignored.append('use_inotify')
+        if 'checkpoint_path' in options:
+            checkpoint_path = options.pop('checkpoint_path')
+            if checkpoint_path is None:
+                checkpoint_path = ROOT_DIR / "data" / "watch_checkpoint.json"
+            if (Path(checkpoint_path) if checkpoint_path else None) != self.checkpoint_path:
+                ignored.append('checkpoint_path')
+        if options:
+            raise TypeError(f"未知的监视参数: {', '.join(options)}")
+        if ignored:
+            print(f"文件监视器已创建，忽略参数: {', '.join(ignored)}")
+
+    @property
+    def mode(self):
+        """当前的监视方式：inotify 或 polling"""
+        return 'inotify' if self._inotify is not None else 'polling'
+
+    def watch(self, path, callback, recursive=True, replay=True):
+        """订阅目录或文件的变化
+
+        Args:
+            path: 目录或文件路径
+            callback: 回调函数，参数为 [(事件类型, 路径), ...]
+            recursive: 监视目录时是否包含子目录
+            replay: 是否补发检查点以来（程序关闭期间）发生的变化
+        """
+        path = os.path.abspath(str(path))
+        is_file = os.path.isfile(path)
+        root = os.path.dirname(path) if is_file else path
+        root_recursive = recursive and not is_file
+
+        subscription = _Subscription(path, is_file, root_recursive, callback, replay)
+        replayed = {}
+        with self._lock:
+            self._subscriptions.append(subscription)
+            if self._thread is not None:
+                replayed = self._add_root(root, root_recursive)
+        self._dispatch(replayed, [subscription], replay=True)
+
+    def start(self):
+        """启动后台监视线程"""
+        if self._thread is not None:
+            return
+
+        if self.use_inotify:
+            try:
+                self._inotify = _Inotify()
+            except (OSError, AttributeError) as e:
+                print(f"inotify不可用，使用轮询方式监视文件: {e}")
+
+        with self._lock:
+            replayed = {}
+            subscriptions = list(self._subscriptions)
+            for subscription in subscriptions:
+                root = os.path.dirname(subscription.path) if subscription.is_file else subscription.path
+                replayed.update(self._add_root(root, subscription.recursive))
+            self._save_checkpoint(full=True)
+        self._dispatch(replayed, subscriptions, replay=True)
+
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name="fs-watcher-dispatch",
+                                            daemon=True)
+        self._dispatcher.start()
+        self._thread = threading.Thread(target=self._run, name="fs-watcher", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        """停止监视并保存检查点"""
+        if self._thread is None:
+            return
+
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+
+        with self._lock:
+            self._batches.put(self._take_pending())
+            self._save_checkpoint(full=True)
+        self._batches.put(None)
+        self._dispatcher.join()
+        self._dispatcher = None
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    def _add_root(self, root, recursive):
+        """添加监视根目录，返回与检查点相比发生的变化"""
+        if self._roots.get(root) is True or (self._roots.get(root) is False and not recursive):
+            return {}
+        self._roots[root] = recursive
+
+        current = self._scan(root, recursive)
+        if self._inotify is not None:
+            self._add_watches(root, recursive, root)
+
+        changes = {}
+        if root in self._checkpoint.get('roots', {}):
+            previous = self._checkpoint.get('files', {})
+            for path, stat in current.items():
+                old = previous.get(path)
+                if old is None:
+                    changes[path] = CREATED
+                elif list(old) != list(stat):
+                    changes[path] = MODIFIED
+            for path in previous:
+                if path not in current and _is_under(path, root, recursive):
+                    changes[path] = DELETED
+
+        for path, stat in current.items():
+            self._set_stat(path, stat)
+        self._full_save = True
+        return changes
+
+    def _scan(self, root, recursive):
+        """扫描目录，返回文件快照"""
+        result = {}
+        stack = [root]
+        while stack:
+            directory = stack.pop()
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if recursive:
+                            stack.append(entry.path)
+                    elif entry.is_file():
+                        stat = entry.stat()
+                        result[entry.path] = (stat.st_mtime_ns, stat.st_size)
+                except OSError:
+                    continue
+        return result
+
+    def _add_watches(self, directory, recursive, root):
+        """为目录（及其子目录）添加inotify监视
+
+        达到系统的监视数量上限（ENOSPC）时，该目录所属的根目录改为轮询，
+        避免未被监视的子目录中的变化被遗漏。
+
+        Args:
+            directory: 目录
+            recursive: 是否包含子目录
+            root: 目录所属的监视根目录
+        """
+        if root in self._polled_roots:
+            return
+
+        stack = [directory]
+        while stack:
+            directory = stack.pop()
+            try:
+                self._inotify.add(directory)
+            except OSError as e:
+                if e.errno == errno.ENOSPC:
+                    self._polled_roots.add(root)
+                    if not self._watch_limit_reported:
+                        self._watch_limit_reported = True
+                        print(f"inotify监视数量已达上限（fs.inotify.max_user_watches），"
+                              f"改为轮询: {root}")
+                    return
+                print(f"无法监视目录 {directory}: {e}")
+                continue
+            if recursive:
+                try:
+                    stack.extend(entry.path for entry in os.scandir(directory)
+                                 if entry.is_dir(follow_symlinks=False))
+                except OSError:
+                    continue
+
+    def _covering_root(self, path):
+        """返回包含该路径的根目录及监视方式
+
+        Returns:
+            tuple: (根目录, 是否递归)，不在监视范围内时为 (None, None)
+        """
+        covered = (None, None)
+        for root, recursive in self._roots.items():
+            if recursive and path.startswith(root + os.sep):
+                return root, True
+            if os.path.dirname(path) == root:
+                covered = (root, False)
+        return covered
+
+    def _set_stat(self, path, stat):
+        """更新快照及目录索引，stat为None时移除"""
+        directory = os.path.dirname(path)
+        if stat is None:
+            del self._snapshot[path]
+            children = self._children.get(directory)
+            if children is not None:
+                children.discard(path)
+                if not children:
+                    del self._children[directory]
+        else:
+            self._snapshot[path] = stat
+            self._children.setdefault(directory, set()).add(path)
+
+    def _files_under(self, directory):
+        """返回快照中位于目录（含子目录）下的文件"""
+        prefix = directory + os.sep
+        result = list(self._children.get(directory, ()))
+        for subdirectory in [d for d in self._children if d.startswith(prefix)]:
+            result.extend(self._children[subdirectory])
+        return result
+
+    def _check_path(self, path, mask=0):
+        """重新检查单个路径，与快照比较后记录变化
+
+        Args:
+            path: 发生变化的路径
+            mask: inotify事件掩码，用于判断被删除的路径是否为目录
+        """
+        root, covered = self._covering_root(path)
+        if root is None:
+            return
+
+        try:
+            stat = os.stat(path, follow_symlinks=False)
+        except OSError:
+            stat = None
+
+        if stat is not None and os.path.isdir(path):
+            if covered:
+                if self._inotify is not None:
+                    self._add_watches(path, True, root)
+                for child, child_stat in self._scan(path, True).items():
+                    self._record(child, child_stat)
+            return
+
+        if stat is None:
+            if mask & IN_ISDIR or path in self._children:
+                # 被删除或移走的目录，清除其下的所有文件
+                for child in self._files_under(path):
+                    self._record(child, None)
+            self._record(path, None)
+        else:
+            self._record(path, (stat.st_mtime_ns, stat.st_size))
+
+    def _record(self, path, stat):
+        """与快照比较并将变化合并到待分发事件中"""
+        old = self._snapshot.get(path)
+        if stat is None:
+            if old is None:
+                return
+            event = DELETED
+        elif old is None:
+            event = CREATED
+        elif old != stat:
+            event = MODIFIED
+        else:
+            return
+
+        self._set_stat(path, stat)
+        self._changed[path] = stat
+        previous = self._pending.get(path)
+        if previous == CREATED and event == DELETED:
+            del self._pending[path]
+        elif previous == CREATED:
+            pass
+        elif previous == DELETED and event == CREATED:
+            self._pending[path] = MODIFIED
+        else:
+            self._pending[path] = event
+
+        now = time.monotonic()
+        if self._first_event is None:
+            self._first_event = now
+        self._last_event = now
+
+    def _poll(self, roots=None):
+        """轮询根目录，与快照比较
+
+        Args:
+            roots: 要轮询的根目录，为None时轮询全部
+        """
+        for root, recursive in list(self._roots.items()):
+            if roots is not None and root not in roots:
+                continue
+            current = self._scan(root, recursive)
+            for path, stat in current.items():
+                if self._snapshot.get(path) != stat:
+                    self._record(path, stat)
+            known = self._files_under(root) if recursive else list(self._children.get(root, ()))
+            for path in known:
+                if path not in current:
+                    self._record(path, None)
+
+    def _run(self):
+        """后台监视线程"""
+        next_poll = time.monotonic() + self.poll_interval
+        while not self._stop_event.is_set():
+            tick = max(0.05, self.debounce / 2)
+            if self._inotify is not None:
+                ready, _, _ = select.select([self._inotify.fd], [], [], tick)
+                if ready:
+                    events = self._inotify.read()
+                    with self._lock:
+                        for mask, path in events:
+                            if path is None:
+                                # 事件队列溢出，退回到一次全量比较
+                                self._poll()
+                            else:
+                                self._check_path(path, mask)
+                if self._polled_roots and time.monotonic() >= next_poll:
+                    # 超出inotify监视上限的根目录
+                    with self._lock:
+                        self._poll(self._polled_roots)
+                    next_poll = time.monotonic() + self.poll_interval
+            else:
+                self._stop_event.wait(tick)
+                if time.monotonic() >= next_poll:
+                    with self._lock:
+                        self._poll()
+                    next_poll = time.monotonic() + self.poll_interval
+
+            with self._lock:
+                now = time.monotonic()
+                if self._pending and (now - self._last_event >= self.debounce
+                                      or now - self._first_event >= self.max_delay):
+                    self._batches.put(self._take_pending())
+                if ((self._changed or self._full_save)
+                        and now - self._last_save >= self.checkpoint_interval):
+                    self._save_checkpoint()
+
+    def _dispatch_loop(self):
+        """分发线程
+
+        回调（例如重新加载模块）可能耗时较长，在单独的线程中按顺序执行且不持有锁，
+        期间监视线程继续读取事件，其他线程也可以调用 watch()
+        """
+        while True:
+            batch = self._batches.get()
+            if batch is None:
+                return
+            self._dispatch(*batch)
+
+    def _take_pending(self):
+        """取出待分发的事件，需在持有锁时调用
+
+        Returns:
+            tuple: (事件, 订阅列表的副本)
+        """
+        pending, self._pending = self._pending, {}
+        self._first_event = self._last_event = None
+        return pending, list(self._subscriptions)
+
+    def _dispatch(self, changes, subscriptions, replay=False):
+        """按订阅范围分发事件"""
+        if not changes:
+            return
+        for subscription in subscriptions:
+            if replay and not subscription.replay:
+                continue
+            batch = [(event, path) for path, event in sorted(changes.items())
+                     if subscription.matches(path)]
+            if batch:
+                try:
+                    subscription.callback(batch)
+                except Exception as e:
+                    print(f"处理文件变化时出错: {e}")
+
+    def _load_checkpoint(self):
+        """读取检查点，并应用追加日志中记录的变化"""
+        if self.checkpoint_path is None or not self.checkpoint_path.exists():
+            return {}
+        try:
+            with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+                checkpoint = json.load(f)
+        except Exception as e:
+            print(f"读取文件监视检查点失败: {e}")
+            return {}
+
+        files = checkpoint.setdefault('files', {})
+        try:
+            with open(self.journal_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        path, stat = json.loads(line)
+                    except ValueError:
+                        # 写入中断留下的不完整行
+                        break
+                    if stat is None:
+                        files.pop(path, None)
+                    else:
+                        files[path] = stat
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"读取文件监视检查点日志失败: {e}")
+        return checkpoint
+
+    def _save_checkpoint(self, full=False):
+        """保存检查点
+
+        Args:
+            full: 是否写入完整快照。否则只把上次保存以来变化的条目追加到日志，
+                日志条目超过快照大小时自动改为完整保存
+        """
+        self._last_save = time.monotonic()
+        if self.checkpoint_path is None:
+            return
+        if not (self._changed or self._full_save or (full and self._journal_entries)):
+            return
+
+        if full or self._full_save or self._journal_entries + len(self._changed) > max(len(self._snapshot), 1000):
+            self._write_checkpoint()
+        else:
+            self._append_journal()
+
+    def _append_journal(self):
+        """将变化的条目追加到检查点日志"""
+        try:
+            with open(self.journal_path, 'a', encoding='utf-8') as f:
+                for path, stat in self._changed.items():
+                    f.write(json.dumps([path, stat]) + '\n')
+            self._journal_entries += len(self._changed)
+            self._changed = {}
+        except Exception as e:
+            print(f"保存文件监视检查点失败: {e}")
+
+    def _write_checkpoint(self):
+        """写入完整检查点，包括根目录列表和文件快照，并清空日志"""
+        # 保留本次未监视的根目录在旧检查点中的记录
+        roots = dict(self._checkpoint.get('roots', {}))
+        files = {path: stat for path, stat in self._checkpoint.get('files', {}).items()
+                 if not any(_is_under(path, root, recursive) for root, recursive in self._roots.items())}
+        roots.update(self._roots)
+        files.update(self._snapshot)
+        self._checkpoint = {'roots': roots, 'files': files}
+
+        try:
+            os.makedirs(self.checkpoint_path.parent, exist_ok=True)
+            temp_path = self.checkpoint_path.with_suffix('.tmp')
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._checkpoint, f)
+            os.replace(temp_path, self.checkpoint_path)
+            try:
+                os.unlink(self.journal_path)
+            except FileNotFoundError:
+                pass
+            self._journal_entries = 0
+            self._changed = {}
+            self._full_save = False
+        except Exception as e:
+            print(f"保存文件监视检查点失败: {e}")
+
+# 全局监视器实例，同一进程中的订阅者共用一个监视线程和检查点文件
+_watcher = None
+_watcher_lock = threading.Lock()
+
+def get_watcher(**options):
+    """获取全局监视器实例
+
+    监视器启动前，后续调用传入的参数会覆盖之前的设置，因此应在启动前用配置的参数
+    调用一次；启动后传入不同的参数会被忽略并输出警告。
+
+    Args:
+        options: 传给 FileWatcher 的参数
+
+    Returns:
+        FileWatcher: 全局监视器实例
+    """
+    global _watcher
+    with _watcher_lock:
+        if _watcher is None:
+            _watcher = FileWatcher(**options)
+        elif options:
+            _watcher.configure(**options)
+        return _watcher
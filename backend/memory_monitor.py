@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+ModuKit - 内存监控
+记录各模块在加载和调用时的内存变化，并判断是否超出全局内存预算
+"""
+
+import os
+import sys
+import time
+import ctypes
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+def current_rss():
+    """获取当前进程的常驻内存（字节），无法获取时返回None"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except Exception:
+        return None
+
+def release_memory():
+    """尽量把空闲内存归还给操作系统（仅glibc有效）"""
+    if sys.platform.startswith('linux'):
+        try:
+            ctypes.CDLL('libc.so.6').malloc_trim(0)
+        except (OSError, AttributeError):
+            pass
+
+class MemoryMonitor:
+    """内存监控器
+
+    每次测量记录RSS和tracemalloc跟踪内存的增量；开启分配跟踪时，
+    还可以通过快照按模块目录统计当前仍被持有的内存。
+    """
+
+    def __init__(self, budget_bytes=None, trace_allocations=False):
+        """初始化内存监控器
+
+        Args:
+            budget_bytes: 全局内存预算（字节），为None或0表示不限制
+            trace_allocations: 是否开启tracemalloc分配跟踪。跟踪会增加每次内存分配的开销，
+                只在需要按模块统计内存占用时开启
+        """
+        self.budget_bytes = budget_bytes or None
+        self.trace_allocations = trace_allocations
+        self.records = {}
+        self._lock = threading.Lock()
+
+        if trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def _traced(self):
+        if tracemalloc.is_tracing():
+            return tracemalloc.get_traced_memory()[0]
+        return None
+
+    def _record(self, name):
+        return self.records.setdefault(name, {
+            'load_rss': None,
+            'load_traced': None,
+            'last_call_rss': None,
+            'last_call_traced': None,
+            'calls': 0,
+            'last_used': None
+        })
+
+    @contextmanager
+    def measure(self, name, kind='call'):
+        """测量代码块执行前后的内存变化
+
+        Args:
+            name: 模块名
+            kind: 'load' 表示加载，'call' 表示调用
+
+        并发执行时增量会包含其他线程的分配，只能作为近似值。
+        """
+        rss_before = current_rss()
+        traced_before = self._traced()
+        try:
+            yield
+        finally:
+            rss_after = current_rss()
+            traced_after = self._traced()
+            rss_delta = None if rss_before is None or rss_after is None else rss_after - rss_before
+            traced_delta = None if traced_before is None or traced_after is None else traced_after - traced_before
+
+            with self._lock:
+                record = self._record(name)
+                if kind == 'load':
+                    record['load_rss'] = rss_delta
+                    record['load_traced'] = traced_delta
+                else:
+                    record['last_call_rss'] = rss_delta
+                    record['last_call_traced'] = traced_delta
+                    record['calls'] += 1
+                record['last_used'] = time.time()
+
+    def touch(self, name):
+        """更新模块的最近使用时间"""
+        with self._lock:
+            self._record(name)['last_used'] = time.time()
+
+    def over_budget(self):
+        """判断当前内存是否超出预算"""
+        if not self.budget_bytes:
+            return False
+        rss = current_rss()
+        return rss is not None and rss > self.budget_bytes
+
+    def idle_modules(self, min_idle=0):
+        """按最近使用时间从早到晚返回空闲时间超过 min_idle 秒的模块"""
+        now = time.time()
+        with self._lock:
+            items = [(record['last_used'] or 0, name) for name, record in self.records.items()]
+        return [name for last_used, name in sorted(items) if now - last_used >= min_idle]
+
+    def module_footprints(self, module_dirs):
+        """通过tracemalloc快照统计各模块目录中代码当前持有的内存
+
+        Args:
+            module_dirs: 字典，键为模块名，值为模块目录
+
+        Returns:
+            dict: 模块名到字节数的映射，未开启分配跟踪时返回空字典
+        """
+        if not tracemalloc.is_tracing():
+            return {}
+
+        snapshot = tracemalloc.take_snapshot()
+        result = {}
+        for name, module_dir in module_dirs.items():
+            pattern = os.path.join(str(module_dir), '*')
+            filtered = snapshot.filter_traces([tracemalloc.Filter(True, pattern)])
+            result[name] = sum(stat.size for stat in filtered.statistics('filename'))
+        return result
+
+    def summary(self):
+        """获取内存概况
+
+        Returns:
+            dict: 进程内存、预算和各模块的记录
+        """
+        with self._lock:
+            modules = {name: dict(record) for name, record in self.records.items()}
+        traced = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else None
+        return {
+            'rss': current_rss(),
+            'budget': self.budget_bytes,
+            'traced_current': traced[0] if traced else None,
+            'traced_peak': traced[1] if traced else None,
+            'modules': modules
+        }
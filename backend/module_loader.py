@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+ModuKit - 模块初始化调度器
+根据模块声明的依赖关系构建有向无环图，按拓扑顺序并发初始化模块
+"""
+
+import time
+import queue
+import asyncio
+import inspect
+import threading
+
+class ModuleInitError(Exception):
+    """模块初始化失败"""
+    pass
+
+def call_init(func):
+    """调用初始化函数，支持普通函数和协程函数"""
+    result = func()
+    if inspect.isawaitable(result):
+        async def _await():
+            return await result
+        result = asyncio.run(_await())
+    return result
+
+class ParallelInitializer:
+    """并发初始化器
+
+    依赖全部初始化成功的模块才会被启动，互不依赖的模块并发执行。
+    某个模块失败或超时后，所有直接或间接依赖它的模块都会被跳过。
+
+    每个模块在独立的守护线程中初始化：超时的初始化无法强制终止，
+    使用守护线程可以保证它不会阻止进程退出。
+    """
+
+    def __init__(self, max_workers=4, timeout=30):
+        """初始化并发初始化器
+
+        Args:
+            max_workers: 同时初始化的模块数
+            timeout: 单个模块的默认超时时间（秒），None表示不限制
+        """
+        self.max_workers = max(1, int(max_workers))
+        self.timeout = timeout
+
+    def run(self, tasks, dependencies, timeouts=None):
+        """执行初始化任务
+
+        Args:
+            tasks: 字典，键为模块名，值为无参数的初始化函数
+            dependencies: 字典，键为模块名，值为其依赖的模块名列表
+            timeouts: 字典，可为单个模块指定超时时间
+
+        Returns:
+            tuple: (results, errors)，分别为成功模块的返回值和失败模块的异常
+        """
+        timeouts = timeouts or {}
+        results = {}
+        errors = {}
+
+        pending = {name: set(dependencies.get(name, ())) for name in tasks}
+        dependents = {name: [] for name in tasks}
+        for name, deps in pending.items():
+            for dep in deps:
+                if dep in dependents:
+                    dependents[dep].append(name)
+
+        def fail(name, error):
+            """标记模块失败，并跳过所有依赖它的模块"""
+            errors[name] = error
+            pending.pop(name, None)
+            for child in dependents[name]:
+                if child in pending:
+                    fail(child, ModuleInitError(f"依赖模块 {name} 初始化失败"))
+
+        for name, deps in list(pending.items()):
+            missing = [dep for dep in deps if dep not in tasks]
+            if missing and name in pending:
+                fail(name, ModuleInitError(f"缺少依赖: {', '.join(missing)}"))
+
+        finished = queue.Queue()
+        running = {}
+
+        def start(name):
+            def target():
+                try:
+                    finished.put((name, tasks[name](), None))
+                except BaseException as e:
+                    finished.put((name, None, e))
+
+            timeout = timeouts.get(name, self.timeout)
+            running[name] = None if timeout is None else time.monotonic() + timeout
+            threading.Thread(target=target, name=f"module-init-{name}", daemon=True).start()
+
+        def start_ready():
+            # 只在并发数未满时启动，避免排队时间计入超时
+            for name in sorted(pending):
+                if len(running) >= self.max_workers:
+                    break
+                if not pending[name]:
+                    del pending[name]
+                    start(name)
+
+        start_ready()
+        while running:
+            deadlines = [d for d in running.values() if d is not None]
+            wait_time = max(0, min(deadlines) - time.monotonic()) if deadlines else None
+            try:
+                name, result, error = finished.get(timeout=wait_time)
+            except queue.Empty:
+                name = None
+
+            # 已超时的模块稍后完成时不在 running 中，其结果被丢弃
+            if name in running:
+                del running[name]
+                if error is not None:
+                    fail(name, error)
+                else:
+                    results[name] = result
+                    for child in dependents[name]:
+                        if child in pending:
+                            pending[child].discard(name)
+
+            now = time.monotonic()
+            for name, deadline in list(running.items()):
+                if deadline is not None and deadline <= now:
+                    del running[name]
+                    fail(name, ModuleInitError("初始化超时"))
+
+            start_ready()
+
+        # 剩余未能提交的模块处于循环依赖中（或依赖于循环中的模块）
+        for name in pending:
+            errors[name] = ModuleInitError("存在循环依赖")
+        pending.clear()
+
+        return results, errors
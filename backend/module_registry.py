@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+ModuKit - 模块注册表
+保存已加载模块的记录，并按注册表版本缓存模块列表及其JSON序列化结果
+"""
+
+import json
+import hashlib
+import threading
+from types import MappingProxyType
+from collections import namedtuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def dumps_bytes(obj):
+    """将对象序列化为UTF-8编码的JSON字节串，安装了orjson时使用orjson"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+# 模块元数据，加载后不再变化
+ModuleMeta = namedtuple('ModuleMeta', ['name', 'title', 'version', 'description', 'author'])
+
+class ModuleEntry:
+    """模块记录
+
+    meta、info 和 module 在注册后不变；instance 可能因内存回收被卸载（为None）
+    后再重新创建，不影响注册表版本。
+    """
+
+    __slots__ = ('meta', 'info', 'module', 'instance')
+
+    def __init__(self, meta, info, module, instance):
+        self.meta = meta
+        self.info = info
+        self.module = module
+        self.instance = instance
+
+class ModuleRegistry:
+    """模块注册表
+
+    每次添加或移除模块时版本号加一，并清空按版本缓存的列表和JSON数据。
+    """
+
+    def __init__(self):
+        self.version = 0
+        self._entries = {}
+        self._lock = threading.RLock()
+        self._views = {}
+
+    def add(self, name, info, module, instance):
+        """注册模块，已存在同名模块时替换"""
+        meta = ModuleMeta(
+            name=name,
+            title=getattr(info, 'name', name),
+            version=getattr(info, 'version', ''),
+            description=getattr(info, 'description', ''),
+            author=getattr(info, 'author', '')
+        )
+        with self._lock:
+            self._entries[name] = ModuleEntry(meta, info, module, instance)
+            self._bump()
+
+    def remove(self, name):
+        """移除模块
+
+        Returns:
+            ModuleEntry: 被移除的记录，不存在时返回None
+        """
+        with self._lock:
+            entry = self._entries.pop(name, None)
+            if entry is not None:
+                self._bump()
+            return entry
+
+    def _bump(self):
+        self.version += 1
+        self._views = {}
+
+    def get(self, name):
+        """获取模块记录，不存在时返回None"""
+        return self._entries.get(name)
+
+    def __contains__(self, name):
+        return name in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self):
+        return iter(self.names())
+
+    def names(self):
+        """获取模块名列表（按注册顺序）"""
+        return self._view('names', lambda entries: tuple(entry.meta.name for entry in entries))
+
+    def entries(self):
+        """获取模块记录列表（按注册顺序）"""
+        return self._view('entries', tuple)
+
+    def records(self):
+        """获取模块摘要列表，用于CLI显示
+
+        返回的数据在版本不变时共享，因此每条摘要都是只读的 MappingProxyType，
+        需要修改或序列化时先用 dict() 复制
+        """
+        return self._view('records', lambda entries: tuple(
+            MappingProxyType({
+                'name': entry.meta.name,
+                'version': entry.meta.version,
+                'description': entry.meta.description,
+                'author': entry.meta.author
+            })
+            for entry in entries
+        ))
+
+    def to_json(self):
+        """获取API使用的模块列表JSON
+
+        Returns:
+            tuple: (JSON字节串, ETag)
+        """
+        def build(entries):
+            body = dumps_bytes([
+                {
+                    'id': entry.meta.name,
+                    'name': entry.meta.title,
+                    'description': entry.meta.description,
+                    'version': entry.meta.version,
+                    'author': entry.meta.author
+                }
+                for entry in entries
+            ])
+            return body, hashlib.sha1(body).hexdigest()
+
+        return self._view('json', build)
+
+    def _view(self, key, factory):
+        """获取按版本缓存的视图，不存在时由 factory 根据当前记录生成"""
+        views = self._views
+        if key in views:
+            return views[key]
+
+        with self._lock:
+            if key not in self._views:
+                self._views[key] = factory(list(self._entries.values()))
+            return self._views[key]
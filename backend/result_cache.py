@@ -0,0 +1,381 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+ModuKit - 结果缓存服务
+为模块操作提供内存LRU和SQLite磁盘两级缓存，模块通过 @cached 装饰器接入
+"""
+
+import os
+import time
+import pickle
+import sqlite3
+import hashlib
+import inspect
+import functools
+import threading
+from pathlib import Path
+from collections import OrderedDict
+
+# 获取项目根目录
+ROOT_DIR = Path(__file__).parent.parent.absolute()
+
+class ResultCache:
+    """两级结果缓存
+
+    内存层按LRU淘汰，磁盘层保存在SQLite数据库中，按总大小淘汰最久未访问的条目。
+    两层都支持按条目设置过期时间（TTL）。
+
+    两层都保存序列化后的数据，每次命中都返回新的副本，调用方修改返回值不会影响缓存；
+    无法序列化的值不会被缓存。
+
+    磁盘命中时不立即更新访问时间，而是先记录在内存中，在写入、淘汰、关闭时或
+    积累到一定数量、间隔一定时间后批量写回，避免每次读取都提交事务。
+    """
+
+    # 访问时间批量写回的条目数和时间间隔（秒）
+    TOUCH_BATCH = 256
+    TOUCH_INTERVAL = 30.0
+
+    def __init__(self, db_path=None, max_entries=1024, max_disk_bytes=256 * 1024 * 1024,
+                 default_ttl=3600, enabled=True):
+        """初始化结果缓存
+
+        Args:
+            db_path: SQLite数据库路径，为None时只使用内存缓存
+            max_entries: 内存层最多保存的条目数
+            max_disk_bytes: 磁盘层最大占用字节数
+            default_ttl: 默认过期时间（秒），None表示永不过期
+            enabled: 是否启用缓存
+        """
+        self.max_entries = max_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.default_ttl = default_ttl
+        self.enabled = enabled
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'sets': 0,
+            'evictions': 0
+        }
+
+        self._db = None
+        self._touched = {}
+        self._last_touch_flush = time.monotonic()
+        self._disk_entries = 0
+        self._disk_bytes = 0
+        if db_path is not None:
+            os.makedirs(Path(db_path).parent, exist_ok=True)
+            self._db = sqlite3.connect(str(db_path), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, namespace TEXT, value BLOB, "
+                "size INTEGER, expires REAL, accessed REAL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_cache_accessed ON cache (accessed)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_cache_expires ON cache (expires)")
+            self._db.commit()
+            self._count_disk()
+
+    def _count_disk(self):
+        """重新统计磁盘层的条目数和总大小，只在打开数据库和批量清除后调用"""
+        self._disk_entries, self._disk_bytes = self._db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache"
+        ).fetchone()
+
+    def get(self, key):
+        """读取缓存
+
+        Returns:
+            tuple: (是否命中, 缓存值的副本)
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                namespace, blob, expires = entry
+                if expires is None or expires > now:
+                    self._memory.move_to_end(key)
+                    self._stats['memory_hits'] += 1
+                    return True, pickle.loads(blob)
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT namespace, value, size, expires FROM cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    namespace, blob, size, expires = row
+                    if expires is None or expires > now:
+                        self._touched[key] = now
+                        if (len(self._touched) >= self.TOUCH_BATCH
+                                or time.monotonic() - self._last_touch_flush >= self.TOUCH_INTERVAL):
+                            self._flush_touched()
+                            self._db.commit()
+                        self._remember(key, namespace, blob, expires)
+                        self._stats['disk_hits'] += 1
+                        return True, pickle.loads(blob)
+                    self._db.execute("DELETE FROM cache WHERE key = ?", (key,))
+                    self._db.commit()
+                    self._touched.pop(key, None)
+                    self._disk_entries -= 1
+                    self._disk_bytes -= size
+
+            self._stats['misses'] += 1
+            return False, None
+
+    def set(self, key, value, ttl=None, namespace=''):
+        """写入缓存
+
+        Args:
+            key: 缓存键
+            value: 缓存值，无法序列化的值不会被缓存
+            ttl: 过期时间（秒），为None时使用默认值
+            namespace: 命名空间，通常为模块名，用于按模块清除缓存
+
+        Returns:
+            bool: 是否已缓存
+        """
+        try:
+            blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            return False
+
+        ttl = self.default_ttl if ttl is None else ttl
+        expires = None if ttl is None else time.time() + ttl
+
+        with self._lock:
+            self._stats['sets'] += 1
+            self._remember(key, namespace, blob, expires)
+
+            if self._db is not None:
+                row = self._db.execute("SELECT size FROM cache WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    self._disk_entries -= 1
+                    self._disk_bytes -= row[0]
+                self._db.execute(
+                    "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, namespace, blob, len(blob), expires, time.time())
+                )
+                self._touched.pop(key, None)
+                self._disk_entries += 1
+                self._disk_bytes += len(blob)
+                if self._disk_bytes > self.max_disk_bytes:
+                    self._evict_disk()
+                else:
+                    self._flush_touched()
+                self._db.commit()
+        return True
+
+    def _remember(self, key, namespace, blob, expires):
+        """写入内存层，超出容量时淘汰最久未使用的条目"""
+        self._memory[key] = (namespace, blob, expires)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._stats['evictions'] += 1
+
+    def _flush_touched(self):
+        """把记录在内存中的访问时间写回磁盘层，由调用方提交事务"""
+        if self._touched:
+            self._db.executemany("UPDATE cache SET accessed = ? WHERE key = ?",
+                                 [(accessed, key) for key, accessed in self._touched.items()])
+            self._touched = {}
+        self._last_touch_flush = time.monotonic()
+
+    def _delete_disk_rows(self, rows):
+        """删除磁盘层中的指定条目并更新统计"""
+        for key, size in rows:
+            self._db.execute("DELETE FROM cache WHERE key = ?", (key,))
+            self._disk_entries -= 1
+            self._disk_bytes -= size
+
+    def _evict_disk(self):
+        """磁盘层超出大小限制时，先清除过期条目，再淘汰最久未访问的条目"""
+        self._flush_touched()
+        expired = self._db.execute(
+            "SELECT key, size FROM cache WHERE expires IS NOT NULL AND expires <= ?", (time.time(),)
+        ).fetchall()
+        self._delete_disk_rows(expired)
+
+        while self._disk_bytes > self.max_disk_bytes:
+            rows = self._db.execute(
+                "SELECT key, size FROM cache ORDER BY accessed LIMIT 64"
+            ).fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                if self._disk_bytes <= self.max_disk_bytes:
+                    break
+                self._delete_disk_rows([(key, size)])
+                self._stats['evictions'] += 1
+
+    def invalidate(self, namespace=None, disk=True):
+        """清除缓存
+
+        Args:
+            namespace: 只清除指定命名空间的条目，为None时清除全部
+            disk: 是否同时清除磁盘层，为False时只清除内存层
+        """
+        with self._lock:
+            if namespace is None:
+                self._memory.clear()
+            else:
+                for key in [k for k, entry in self._memory.items() if entry[0] == namespace]:
+                    del self._memory[key]
+
+            if disk and self._db is not None:
+                if namespace is None:
+                    self._db.execute("DELETE FROM cache")
+                else:
+                    self._db.execute("DELETE FROM cache WHERE namespace = ?", (namespace,))
+                self._db.commit()
+                self._count_disk()
+
+    def stats(self):
+        """获取缓存统计信息
+
+        Returns:
+            dict: 命中、未命中、淘汰次数及各层占用情况
+        """
+        with self._lock:
+            result = dict(self._stats)
+            result['enabled'] = self.enabled
+            result['memory_entries'] = len(self._memory)
+            if self._db is not None:
+                result['disk_entries'] = self._disk_entries
+                result['disk_bytes'] = self._disk_bytes
+
+        lookups = result['memory_hits'] + result['disk_hits'] + result['misses']
+        result['hit_rate'] = round((lookups - result['misses']) / lookups, 4) if lookups else 0.0
+        return result
+
+    def close(self):
+        """关闭磁盘数据库连接"""
+        with self._lock:
+            if self._db is not None:
+                self._flush_touched()
+                self._db.commit()
+                self._db.close()
+                self._db = None
+
+# 全局缓存实例
+_cache = None
+_cache_lock = threading.Lock()
+
+def configure_cache(**options):
+    """按配置创建全局缓存实例
+
+    Args:
+        options: 传给 ResultCache 的参数，db_path 默认为 data/result_cache.db
+
+    Returns:
+        ResultCache: 新的全局缓存实例
+    """
+    global _cache
+    options.setdefault('db_path', ROOT_DIR / "data" / "result_cache.db")
+    with _cache_lock:
+        if _cache is not None:
+            _cache.close()
+        _cache = ResultCache(**options)
+        return _cache
+
+def get_cache():
+    """获取全局缓存实例，尚未配置时使用默认参数创建"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResultCache(db_path=ROOT_DIR / "data" / "result_cache.db")
+    return _cache
+
+def file_fingerprint(path):
+    """计算文件指纹（路径、大小、修改时间），文件不存在时返回None"""
+    try:
+        stat = os.stat(path)
+    except (OSError, TypeError, ValueError):
+        return None
+    return (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+
+def make_key(namespace, name, arguments, files=()):
+    """根据函数名、参数和输入文件指纹生成缓存键
+
+    Args:
+        namespace: 命名空间
+        name: 函数限定名
+        arguments: 参数字典
+        files: 需要计算指纹的参数名列表，参数值可以是路径或路径列表
+    """
+    fingerprints = []
+    for arg in files:
+        value = arguments.get(arg)
+        paths = value if isinstance(value, (list, tuple)) else [value]
+        fingerprints.append([file_fingerprint(p) for p in paths if p is not None])
+
+    payload = (namespace, name, sorted(arguments.items()), fingerprints)
+    try:
+        data = pickle.dumps(payload, protocol=4)
+    except Exception:
+        data = repr(payload).encode('utf-8')
+    return hashlib.sha256(data).hexdigest()
+
+def _module_namespace(func):
+    """根据函数所在的Python模块推断ModuKit模块名"""
+    parts = func.__module__.split('.')
+    if len(parts) > 1 and parts[0] == 'modules':
+        return parts[1]
+    return func.__module__
+
+def cached(ttl=None, files=(), namespace=None):
+    """模块操作结果缓存装饰器
+
+    用法:
+        class Module:
+            @cached(ttl=600, files=("path",))
+            def stats(self, path):
+                ...
+
+    缓存键由函数名、参数（不含self）以及 files 中列出的参数所指文件的
+    大小和修改时间组成，输入文件变化后会自动失效。
+
+    Args:
+        ttl: 过期时间（秒），为None时使用缓存的默认值
+        files: 表示输入文件路径的参数名列表
+        namespace: 命名空间，默认为函数所在的模块名
+    """
+    def decorator(func):
+        if inspect.isgeneratorfunction(func) or inspect.iscoroutinefunction(func):
+            raise TypeError(f"无法缓存生成器或协程函数: {func.__qualname__}")
+
+        signature = inspect.signature(func)
+        cache_namespace = namespace or _module_namespace(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            cache = get_cache()
+            if not cache.enabled:
+                return func(*args, **kwargs)
+
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = dict(bound.arguments)
+            arguments.pop('self', None)
+            arguments.pop('cls', None)
+
+            key = make_key(cache_namespace, func.__qualname__, arguments, files)
+            hit, value = cache.get(key)
+            if hit:
+                return value
+
+            value = func(*args, **kwargs)
+            cache.set(key, value, ttl=ttl, namespace=cache_namespace)
+            return value
+
+        wrapper.cache_namespace = cache_namespace
+        return wrapper
+
+    return decorator
@@ -7,28 +7,57 @@ ModuKit - 后端服务器
 """
 
 import os
+import json
+import hashlib
+import functools
 from pathlib import Path
-from flask import Flask, jsonify, request, send_from_directory
+from flask import Flask, jsonify, request, send_file, send_from_directory
 from flask_cors import CORS
+from werkzeug.http import parse_content_range_header
+
+from backend.result_cache import get_cache
+from backend.memory_monitor import current_rss
+from backend.file_store import FileStore, UploadOffsetError
+from backend.module_registry import dumps_bytes
 
 # 获取项目根目录
 ROOT_DIR = Path(__file__).parent.parent.absolute()
 STATIC_DIR = ROOT_DIR / "static"
 
-def create_app(debug=False):
-    """创建Flask应用实例"""
+def create_app(debug=False, modukit=None):
+    """创建Flask应用实例
+    
+    Args:
+        debug: 是否启用调试模式
+        modukit: ModuKit实例，提供模块信息和内存统计，可以为None
+    """
     app = Flask(__name__, static_folder=str(STATIC_DIR))
     app.config['DEBUG'] = debug
     
-    # 允许跨域请求
-    CORS(app)
+    # 只允许跨域读取，上传、删除等修改操作由 same_origin_only 限制为同源请求
+    CORS(app, resources={r"/api/*": {"methods": ["GET", "HEAD", "OPTIONS"]}})
     
     # 注册路由
-    register_routes(app)
+    register_routes(app, modukit)
+    register_file_routes(app, FileStore())
     
     return app
 
-def register_routes(app):
+def same_origin_only(view):
+    """拒绝来自其他源的浏览器请求
+
+    跨域的简单请求不经过预检就会被执行，只靠CORS响应头无法阻止，
+    因此修改数据的接口需要检查 Origin。没有 Origin 的请求（命令行工具等）不受影响。
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        origin = request.headers.get('Origin')
+        if origin is not None and origin.rstrip('/') != request.host_url.rstrip('/'):
+            return jsonify({'error': '不允许跨域请求'}), 403
+        return view(*args, **kwargs)
+    return wrapper
+
+def register_routes(app, modukit=None):
     """注册API路由"""
     
     @app.route('/')
@@ -43,44 +72,60 @@ def register_routes(app):
     
     @app.route('/api/status', methods=['GET'])
     def status():
-        """返回服务器状态"""
+        """返回服务器状态，?detail=1 时统计每个模块当前的内存占用（开销较大）"""
+        detail = request.args.get('detail') in ('1', 'true')
         return jsonify({
             'status': 'running',
-            'version': '0.1.0'
+            'version': '0.1.0',
+            'cache': get_cache().stats(),
+            'memory': modukit.memory_status(detail) if modukit else {'rss': current_rss()}
         })
     
+    # 未提供ModuKit实例时返回的示例数据，只在注册路由时序列化一次
+    sample_modules = [
+        {
+            'id': 'file_tools',
+            'name': '文件工具',
+            'description': '文件处理相关工具集',
+            'version': '0.1.0'
+        },
+        {
+            'id': 'text_tools',
+            'name': '文本工具',
+            'description': '文本处理相关工具集',
+            'version': '0.1.0'
+        },
+        {
+            'id': 'image_tools',
+            'name': '图像工具',
+            'description': '图像处理相关工具集',
+            'version': '0.1.0'
+        },
+        {
+            'id': 'data_analysis',
+            'name': '数据分析',
+            'description': '数据分析相关工具集',
+            'version': '0.1.0'
+        }
+    ]
+    sample_body = dumps_bytes(sample_modules)
+    sample_etag = hashlib.sha1(sample_body).hexdigest()
+    
     @app.route('/api/modules', methods=['GET'])
     def list_modules():
-        """列出所有可用模块"""
-        # 这里需要实现模块列表获取逻辑
-        # 暂时返回示例数据
-        modules = [
-            {
-                'id': 'file_tools',
-                'name': '文件工具',
-                'description': '文件处理相关工具集',
-                'version': '0.1.0'
-            },
-            {
-                'id': 'text_tools',
-                'name': '文本工具',
-                'description': '文本处理相关工具集',
-                'version': '0.1.0'
-            },
-            {
-                'id': 'image_tools',
-                'name': '图像工具',
-                'description': '图像处理相关工具集',
-                'version': '0.1.0'
-            },
-            {
-                'id': 'data_analysis',
-                'name': '数据分析',
-                'description': '数据分析相关工具集',
-                'version': '0.1.0'
-            }
-        ]
-        return jsonify(modules)
+        """列出所有可用模块
+        
+        直接返回注册表按版本缓存的JSON字节串，注册表未变化时不再重新序列化
+        """
+        if modukit is not None:
+            body, etag = modukit.modules.to_json()
+        else:
+            body, etag = sample_body, sample_etag
+            
+        # 附加ETag，客户端缓存未过期时返回304
+        response = app.response_class(body, mimetype='application/json')
+        response.set_etag(etag)
+        return response.make_conditional(request)
     
     @app.route('/api/modules/<module_id>', methods=['GET'])
     def get_module(module_id):
@@ -106,6 +151,98 @@ def register_routes(app):
             ]
         }
         return jsonify(module)
+    
+    @app.route('/api/modules/<module_id>/run', methods=['POST'])
+    @same_origin_only
+    def run_module(module_id):
+        """执行模块，请求体可以为 {"args": [参数, ...]}"""
+        if modukit is None:
+            return jsonify({'error': '模块服务不可用'}), 503
+        if module_id not in modukit.modules:
+            return jsonify({'error': f'模块不存在: {module_id}'}), 404
+            
+        payload = request.get_json(silent=True) or {}
+        args = [str(arg) for arg in payload.get('args', [])]
+        
+        try:
+            result = modukit.execute_command(['use', module_id] + args)
+            records = [] if result is None else list(result)
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+            
+        body = json.dumps({'id': module_id, 'result': records}, ensure_ascii=False, default=str)
+        return app.response_class(body, mimetype='application/json')
+
+def register_file_routes(app, store):
+    """注册文件上传下载路由
+    
+    上传使用 PUT 原始请求体，按块写入磁盘；携带 Content-Range 时支持分段和断点续传，
+    总大小未知时可以使用 "bytes 0-99/*"，直到带有总大小的分段到达才算完成。
+    发送 "Content-Range: bytes */<总大小>" 的空请求可以查询已接收的字节数，
+    从偏移0重新上传会丢弃之前未完成的数据。
+    下载支持 Range 请求，文件内容通过 wsgi.file_wrapper 输出。
+    """
+    
+    @app.route('/api/files', methods=['GET'])
+    def list_files():
+        """列出已上传的文件"""
+        return jsonify(store.list_files())
+    
+    @app.route('/api/files/<name>', methods=['PUT'])
+    @same_origin_only
+    def upload_file(name):
+        """上传文件"""
+        content_range = None
+        if 'Content-Range' in request.headers:
+            content_range = parse_content_range_header(request.headers['Content-Range'])
+            if content_range is None or content_range.units != 'bytes':
+                return jsonify({'error': '无效的Content-Range'}), 400
+        
+        try:
+            if content_range is not None and content_range.start is None:
+                # 只查询上传进度
+                received, complete = store.received(name), False
+            else:
+                offset = content_range.start if content_range else 0
+                total = content_range.length if content_range else None
+                length = content_range.stop - content_range.start if content_range else None
+                received, complete = store.write_stream(
+                    name, request.stream, offset, total, ranged=content_range is not None,
+                    length=length
+                )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except UploadOffsetError as e:
+            return jsonify({'error': str(e), 'received': e.received}), 409
+        
+        return jsonify({
+            'name': name,
+            'received': received,
+            'complete': complete
+        }), 201 if complete else 202
+    
+    @app.route('/api/files/<name>', methods=['GET'])
+    def download_file(name):
+        """下载文件，支持Range请求和断点续传"""
+        try:
+            path = store.path(name)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+            
+        if not path.is_file():
+            return jsonify({'error': f'文件不存在: {name}'}), 404
+            
+        return send_file(path, as_attachment=True, download_name=name, conditional=True)
+    
+    @app.route('/api/files/<name>', methods=['DELETE'])
+    @same_origin_only
+    def delete_file(name):
+        """删除文件"""
+        try:
+            deleted = store.delete(name)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify({'deleted': deleted}), 200 if deleted else 404
 
 if __name__ == '__main__':
     app = create_app(debug=True)
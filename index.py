@@ -26,6 +26,7 @@ import os
 import sys
 import argparse
 import threading
+import contextlib
 import logging
 from pathlib import Path
 from datetime import datetime
@@ -48,6 +49,8 @@ logger = logging.getLogger("ModuKit")
 sys.path.append(str(ROOT_DIR))
 from backend.server import create_app
 from backend.config_loader import ConfigLoader
+from backend.batch_runner import BatchRunner, parse_pipeline, read_script
+from backend.fs_watcher import get_watcher
 
 def parse_arguments():
     """解析命令行参数"""
@@ -58,11 +61,28 @@ def parse_arguments():
                         help="配置文件路径")
     parser.add_argument("--cli", action="store_true", help="使用命令行模式，不启动GUI")
     parser.add_argument("--gui", action="store_true", help="使用GUI模式，启动独立窗口")
+    parser.add_argument("-c", "--command", action="append", default=[],
+                        help="以批处理模式执行命令，可多次指定")
+    parser.add_argument("-f", "--script", type=str,
+                        help="从脚本文件读取命令，'-' 表示标准输入")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="批处理模式下并发执行的命令数")
+    parser.add_argument("--stop-on-error", action="store_true", help="批处理模式下遇到错误立即停止")
     return parser.parse_args()
 
+def create_modukit():
+    """创建ModuKit实例，失败时返回None，服务器仍可提供静态页面"""
+    try:
+        from main import ModuKit
+        return ModuKit()
+    except Exception as e:
+        logger.error(f"加载ModuKit失败: {str(e)}")
+        return None
+
 def start_server(port, debug):
     """在单独线程中启动Flask服务器"""
-    app = create_app(debug=debug)
+    app = create_app(debug=debug, modukit=create_modukit())
+    # ModuKit已按配置设置并启动了监视器；未能加载ModuKit时在这里启动
+    get_watcher().start()
     
     if debug:
         # 开发模式使用Flask内置服务器
@@ -71,7 +91,8 @@ def start_server(port, debug):
         # 生产模式使用waitress
         try:
             from waitress import serve
-            serve(app, host="127.0.0.1", port=port)
+            # waitress默认限制请求体为1GB，放宽限制以支持大文件上传（请求体由waitress缓存到临时文件）
+            serve(app, host="127.0.0.1", port=port, max_request_body_size=64 * 1024 ** 3)
         except ImportError:
             logger.warning("未安装waitress，使用Flask内置服务器")
             app.run(port=port, debug=False, use_reloader=False)
@@ -280,6 +301,61 @@ def run_cli_mode(config, server_port):
         except Exception as e:
             print(f"错误: {str(e)}")
 
+# 由入口程序直接处理、不需要加载ModuKit的批处理命令
+LOCAL_BATCH_COMMANDS = ("status", "modules")
+
+def create_batch_executor(config, server_port, app=None):
+    """创建批处理模式使用的命令执行函数
+    
+    status 和 modules 命令由入口程序处理，其余命令（list、use 等）
+    交给 ModuKit 实例 app 执行。
+    """
+    def execute(argv, records):
+        cmd = argv[0]
+        
+        if cmd == "status":
+            return iter([{
+                'status': 'running' if server_port else 'batch',
+                'port': server_port,
+                'version': config.get('app', {}).get('version', '0.1.0')
+            }])
+        elif cmd == "modules":
+            modules_str = config.get('modules', {}).get('enabled', '')
+            return (m.strip() for m in modules_str.split(',') if m.strip())
+        elif app is None:
+            raise ValueError(f"未知命令: {cmd}")
+        else:
+            return app.execute_command(argv, records)
+    
+    return execute
+
+def run_batch_mode(config, commands, jobs=1, stop_on_error=False):
+    """运行批处理模式
+    
+    需要模块的命令存在时，在启动执行器之前加载 ModuKit，
+    避免在并发任务中替换全局的标准输出。
+    
+    Returns:
+        int: 失败的命令数
+    """
+    def needs_app(command):
+        try:
+            return any(argv[0] not in LOCAL_BATCH_COMMANDS for argv in parse_pipeline(command))
+        except ValueError:
+            # 语法错误由执行器报告
+            return False
+    
+    app = None
+    if any(needs_app(command) for command in commands):
+        from main import ModuKit
+        # 模块加载信息输出到stderr，保持stdout只包含命令输出
+        with contextlib.redirect_stdout(sys.stderr):
+            app = ModuKit()
+    
+    runner = BatchRunner(create_batch_executor(config, None, app), jobs=jobs,
+                         stop_on_error=stop_on_error)
+    return runner.run(commands)
+
 def main():
     """主函数"""
     # 解析命令行参数
@@ -293,6 +369,19 @@ def main():
     config_loader = ConfigLoader(args.config)
     config = config_loader.get_config()
     
+    # 批处理模式 - 不启动服务器和界面，执行完命令后退出
+    commands = list(args.command)
+    if args.script:
+        commands.extend(read_script(args.script))
+    if commands:
+        failed = run_batch_mode(config, commands, args.jobs, args.stop_on_error)
+        sys.exit(1 if failed else 0)
+    
+    # 监视配置文件，修改后自动重新加载。监视器由 start_server 在ModuKit按其配置
+    # 设置好监视参数后启动，GUI模式下没有ModuKit，直接启动
+    watcher = get_watcher()
+    config_loader.watch(watcher, lambda _: logger.info("配置文件已重新加载"))
+    
     # 默认使用CLI模式，除非指定了--gui参数
     if args.gui:
         # GUI模式 - 使用PyWebView创建独立窗口
@@ -323,6 +412,7 @@ def main():
                 setup_tray(window)
                 
                 # 启动GUI
+                watcher.start()
                 logger.info("启动PyWebView")
                 webview.start(debug=args.debug)
             else:
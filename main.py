@@ -6,19 +6,34 @@ ModuKit - 模块化工具箱
 主程序文件
 """
 
+import gc
 import os
 import sys
 import json
+import time
+import argparse
 import importlib
+import functools
+import threading
+import contextlib
 from pathlib import Path
+from collections.abc import Iterator
+
+from backend.batch_runner import BatchRunner, read_script
+from backend.module_loader import ParallelInitializer, call_init
+from backend.result_cache import configure_cache
+from backend.memory_monitor import MemoryMonitor, current_rss, release_memory
+from backend.fs_watcher import get_watcher
+from backend.module_registry import ModuleRegistry
 
 class ModuKit:
     """ModuKit主类，负责管理和加载模块"""
     
     def __init__(self):
         self.version = "0.1.0"
-        self.modules = {}
+        self.modules = ModuleRegistry()
         self.config = {}
+        self._modules_lock = threading.RLock()
         self.module_path = Path(__file__).parent / "modules"
         self.config_path = Path(__file__).parent / "config.json"
         
@@ -28,9 +43,19 @@ class ModuKit:
         # 加载配置
         self._load_config()
         
+        # 初始化结果缓存
+        self.cache = self._create_cache()
+        
+        # 初始化内存监控
+        self.memory = self._create_memory_monitor()
+        self._next_budget_check = 0.0
+        
         # 加载模块
         self._load_modules()
         
+        # 监视模块目录和配置文件的变化
+        self._start_watcher()
+        
     def _create_directories(self):
         """创建必要的目录结构"""
         directories = [
@@ -62,6 +87,26 @@ class ModuKit:
             "theme": "default",
             "language": "zh_CN",
             "enabled_modules": [],
+            "module_init_workers": 4,
+            "module_init_timeout": 30,
+            "cache": {
+                "enabled": True,
+                "max_entries": 1024,
+                "max_disk_mb": 256,
+                "default_ttl": 3600
+            },
+            "memory": {
+                "budget_mb": 0,
+                "idle_seconds": 300,
+                "enforce_interval": 60,
+                "trace_allocations": False
+            },
+            "watch": {
+                "enabled": True,
+                "use_inotify": True,
+                "debounce": 0.5,
+                "poll_interval": 2.0
+            },
             "user_settings": {}
         }
         
@@ -71,47 +116,278 @@ class ModuKit:
             
         return default_config
     
-    def _load_modules(self):
-        """加载所有模块"""
+    def _create_cache(self):
+        """根据配置创建模块结果缓存"""
+        cache_config = self.config.get("cache", {})
+        return configure_cache(
+            enabled=cache_config.get("enabled", True),
+            max_entries=cache_config.get("max_entries", 1024),
+            max_disk_bytes=int(cache_config.get("max_disk_mb", 256) * 1024 * 1024),
+            default_ttl=cache_config.get("default_ttl", 3600)
+        )
+    
+    def _create_memory_monitor(self):
+        """根据配置创建内存监控器，budget_mb 为0表示不限制"""
+        memory_config = self.config.get("memory", {})
+        return MemoryMonitor(
+            budget_bytes=int(memory_config.get("budget_mb", 0) * 1024 * 1024),
+            trace_allocations=memory_config.get("trace_allocations", False)
+        )
+    
+    def _load_modules(self, names=None):
+        """加载模块
+        
+        先依次导入模块并读取 ModuleInfo 中声明的依赖，再按依赖关系构建的
+        有向无环图在线程池中并发实例化和初始化模块。
+        
+        Args:
+            names: 只加载（或重新加载）指定的模块，为None时加载全部模块
+        """
         if not self.module_path.exists():
             return
             
+        candidates = {}
+        if names is not None:
+            # 让导入系统发现新建的模块目录
+            importlib.invalidate_caches()
+        
         # 遍历模块目录
-        for module_dir in self.module_path.iterdir():
+        for module_dir in sorted(self.module_path.iterdir()):
+            if names is not None and module_dir.name not in names:
+                continue
             if module_dir.is_dir() and (module_dir / "__init__.py").exists():
                 module_name = module_dir.name
                 try:
-                    # 动态导入模块
+                    # 动态导入模块，已导入过的模块重新加载
                     module_path = f"modules.{module_name}"
-                    module = importlib.import_module(module_path)
+                    if names is not None and module_path in sys.modules:
+                        module = importlib.reload(sys.modules[module_path])
+                    else:
+                        module = importlib.import_module(module_path)
                     
                     # 检查模块是否有效
                     if hasattr(module, "ModuleInfo") and hasattr(module, "Module"):
-                        self.modules[module_name] = {
-                            "info": module.ModuleInfo,
-                            "instance": module.Module()
-                        }
-                        print(f"成功加载模块: {module_name}")
+                        candidates[module_name] = module
                     else:
                         print(f"模块格式无效: {module_name}")
                 except Exception as e:
                     print(f"加载模块 {module_name} 失败: {e}")
+        
+        tasks = {}
+        dependencies = {}
+        timeouts = {}
+        for module_name, module in candidates.items():
+            tasks[module_name] = functools.partial(self._init_module, module)
+            # 已加载且不在本次加载范围内的依赖视为已满足
+            dependencies[module_name] = [
+                dep for dep in getattr(module.ModuleInfo, "dependencies", [])
+                if dep in candidates or dep not in self.modules
+            ]
+            if hasattr(module.ModuleInfo, "init_timeout"):
+                timeouts[module_name] = module.ModuleInfo.init_timeout
+        
+        initializer = ParallelInitializer(
+            max_workers=self.config.get("module_init_workers", os.cpu_count() or 4),
+            timeout=self.config.get("module_init_timeout", 30)
+        )
+        instances, errors = initializer.run(tasks, dependencies, timeouts)
+        
+        # 按目录顺序登记，保证模块列表顺序稳定
+        for module_name, module in candidates.items():
+            if module_name in instances:
+                self.modules.add(module_name, module.ModuleInfo, module, instances[module_name])
+                print(f"成功加载模块: {module_name}")
+            else:
+                print(f"加载模块 {module_name} 失败: {errors[module_name]}")
+                
+        self._enforce_memory_budget()
+    
+    def _start_watcher(self):
+        """启动文件监视，模块目录或配置文件变化时增量更新，无需重新扫描"""
+        watch_config = self.config.get("watch", {})
+        if not watch_config.get("enabled", True):
+            self.watcher = None
+            return
+            
+        self.watcher = get_watcher(
+            use_inotify=watch_config.get("use_inotify", True),
+            debounce=watch_config.get("debounce", 0.5),
+            poll_interval=watch_config.get("poll_interval", 2.0)
+        )
+        # 启动时已完整加载模块和配置，不需要补发关闭期间的变化
+        self.watcher.watch(self.module_path, self._on_modules_changed, replay=False)
+        self.watcher.watch(self.config_path, self._on_config_changed, replay=False)
+        self.watcher.start()
+    
+    def _on_modules_changed(self, changes):
+        """模块目录变化时，加载新模块、重新加载修改过的模块并移除已删除的模块"""
+        names = set()
+        for event, path in changes:
+            relative = Path(path).relative_to(self.module_path)
+            if len(relative.parts) < 2 or "__pycache__" in relative.parts or relative.suffix == ".pyc":
+                continue
+            if not relative.parts[0].startswith((".", "__")):
+                names.add(relative.parts[0])
+                
+        reload_names = []
+        for module_name in sorted(names):
+            if (self.module_path / module_name / "__init__.py").exists():
+                self.unload_module(module_name)
+                reload_names.append(module_name)
+            elif module_name in self.modules:
+                self.unload_module(module_name)
+                self.modules.remove(module_name)
+                print(f"已移除模块: {module_name}")
+                
+        if reload_names:
+            self._load_modules(reload_names)
+    
+    def _on_config_changed(self, changes):
+        """配置文件变化时重新加载配置"""
+        if not any(event != "deleted" for event, _ in changes):
+            return
+            
+        # 只解析文件，不回退到默认配置：编辑到一半的文件不应覆盖用户的配置
+        try:
+            with open(self.config_path, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+            if not isinstance(config, dict):
+                raise ValueError("配置文件内容必须是JSON对象")
+        except Exception as e:
+            print(f"重新加载配置文件失败，继续使用当前配置: {e}")
+            return
+            
+        self.config = config
+        self.memory.budget_bytes = int(self.config.get("memory", {}).get("budget_mb", 0) * 1024 * 1024) or None
+        print("配置文件已重新加载")
+    
+    def _init_module(self, module):
+        """实例化模块并执行可选的 init 方法（可以是协程函数）"""
+        with self.memory.measure(module.__name__.split(".")[-1], "load"):
+            instance = module.Module()
+            if hasattr(instance, "init"):
+                call_init(instance.init)
+        return instance
     
     def get_module(self, module_name):
-        """获取指定名称的模块"""
-        return self.modules.get(module_name, {}).get("instance")
+        """获取指定名称的模块，已被卸载的模块会重新实例化"""
+        entry = self.modules.get(module_name)
+        if entry is None:
+            return None
+            
+        with self._modules_lock:
+            if entry.instance is None:
+                entry.instance = self._init_module(entry.module)
+            # 在锁内取出实例，避免返回前被内存回收置为None
+            instance = entry.instance
+                
+        self.memory.touch(module_name)
+        return instance
+    
+    def unload_module(self, module_name, keep_disk_cache=False):
+        """卸载模块实例并清除其缓存，模块信息保留，下次使用时重新实例化
+        
+        Args:
+            module_name: 模块名
+            keep_disk_cache: 是否保留磁盘缓存。内存回收时只清除内存中的缓存，
+                磁盘上的结果在重启后仍可使用；模块代码变化时应全部清除
+                
+        Returns:
+            bool: 是否卸载了实例
+        """
+        entry = self.modules.get(module_name)
+        if entry is None:
+            return False
+            
+        with self._modules_lock:
+            instance, entry.instance = entry.instance, None
+            
+        self.cache.invalidate(module_name, disk=not keep_disk_cache)
+        if instance is None:
+            return False
+            
+        if hasattr(instance, "unload"):
+            try:
+                instance.unload()
+            except Exception as e:
+                print(f"卸载模块 {module_name} 时出错: {e}")
+                
+        return True
+    
+    def _enforce_memory_budget(self, active=None):
+        """超出内存预算时，按最近最少使用的顺序卸载空闲模块
+        
+        预算与整个进程的RSS比较，释放的内存不一定能归还给系统。因此卸载后RSS
+        没有下降时立即停止，且两次回收之间至少间隔 enforce_interval 秒，
+        避免预算低于进程基础占用时反复卸载和重建模块。
+        
+        Args:
+            active: 正在使用、不应被卸载的模块名
+            
+        Returns:
+            list: 被卸载的模块名
+        """
+        now = time.monotonic()
+        if now < self._next_budget_check or not self.memory.over_budget():
+            return []
+            
+        memory_config = self.config.get("memory", {})
+        self._next_budget_check = now + memory_config.get("enforce_interval", 60)
+        idle_seconds = memory_config.get("idle_seconds", 300)
+        unloaded = []
+        for module_name in self.memory.idle_modules(idle_seconds):
+            if module_name == active:
+                continue
+                
+            rss_before = current_rss()
+            if not self.unload_module(module_name, keep_disk_cache=True):
+                continue
+                
+            unloaded.append(module_name)
+            gc.collect()
+            release_memory()
+            if not self.memory.over_budget():
+                break
+                
+            rss_after = current_rss()
+            if rss_before is None or rss_after is None or rss_after >= rss_before:
+                break
+                
+        if unloaded:
+            print(f"内存超出预算，已卸载空闲模块: {', '.join(unloaded)}")
+        return unloaded
+    
+    def memory_status(self, detail=False):
+        """获取内存使用情况，包括每个模块的加载和调用增量
+        
+        Args:
+            detail: 是否通过tracemalloc快照统计每个模块当前的内存占用，
+                快照开销较大，不适合频繁调用
+                
+        Returns:
+            dict: 内存概况
+        """
+        status = self.memory.summary()
+        footprints = {}
+        if detail:
+            footprints = self.memory.module_footprints(
+                {name: self.module_path / name for name in self.modules}
+            )
+        for entry in self.modules.entries():
+            name = entry.meta.name
+            record = status["modules"].setdefault(name, {})
+            record["loaded"] = entry.instance is not None
+            if name in footprints:
+                record["footprint"] = footprints[name]
+        return status
     
     def list_modules(self):
-        """列出所有已加载的模块"""
-        return [
-            {
-                "name": name,
-                "version": info["info"].version,
-                "description": info["info"].description,
-                "author": info["info"].author
-            }
-            for name, info in self.modules.items()
-        ]
+        """列出所有已加载的模块
+        
+        Returns:
+            tuple: 只读的模块摘要（MappingProxyType），注册表未变化时返回同一份数据
+        """
+        return self.modules.records()
     
     def run(self):
         """运行ModuKit"""
@@ -140,6 +416,10 @@ class ModuKit:
             elif cmd.startswith("use "):
                 module_name = cmd[4:].strip()
                 self._use_module(module_name)
+            elif cmd == "cache" or cmd.startswith("cache "):
+                self._cache_cli(cmd.split()[1:])
+            elif cmd == "memory":
+                self._memory_cli()
             else:
                 print("未知命令，输入 'help' 获取帮助")
     
@@ -149,7 +429,12 @@ class ModuKit:
         print("  help       - 显示帮助信息")
         print("  list       - 列出所有可用模块")
         print("  use <模块>  - 使用指定模块")
+        print("  cache      - 显示缓存统计信息")
+        print("  cache clear [模块] - 清除全部或指定模块的缓存")
+        print("  memory     - 显示内存使用情况")
         print("  exit       - 退出程序")
+        print("\n批处理模式中可以使用 '|' 将模块串联为管道，例如:")
+        print("  use 模块A 参数 | use 模块B")
     
     def _list_modules_cli(self):
         """在CLI中列出所有模块"""
@@ -163,6 +448,58 @@ class ModuKit:
         for module in modules:
             print(f"  {module['name']} (v{module['version']}) - {module['description']}")
     
+    def _cache_cli(self, args):
+        """在CLI中显示或清除缓存"""
+        try:
+            result = self._cache_command(args)
+        except ValueError as e:
+            print(f"{e}，输入 'help' 获取帮助")
+            return
+
+        if args and args[0] == "clear":
+            print(f"已清除缓存: {result['cleared']}")
+            return
+            
+        print("\n缓存统计:")
+        for key, value in result.items():
+            print(f"  {key}: {value}")
+    
+    def _cache_command(self, args):
+        """执行缓存命令
+        
+        Args:
+            args: 命令参数，为空时返回统计信息，['clear', 模块名] 清除缓存
+            
+        Returns:
+            dict: 统计信息或清除结果
+        """
+        if not args:
+            return self.cache.stats()
+        if args[0] == "clear":
+            namespace = args[1] if len(args) > 1 else None
+            self.cache.invalidate(namespace)
+            return {"cleared": namespace or "all"}
+        raise ValueError(f"未知的缓存命令: {args[0]}")
+    
+    def _memory_cli(self):
+        """在CLI中显示内存使用情况"""
+        status = self.memory_status(detail=True)
+        
+        def mb(value):
+            return "-" if value is None else f"{value / 1024 / 1024:.2f}MB"
+            
+        print(f"\n进程内存: {mb(status['rss'])}，预算: {mb(status['budget']) if status['budget'] else '不限制'}")
+        if status["traced_current"] is not None:
+            print(f"跟踪内存: {mb(status['traced_current'])}，峰值: {mb(status['traced_peak'])}")
+            
+        if status["modules"]:
+            print("\n模块内存:")
+        for name, record in status["modules"].items():
+            state = "已加载" if record.get("loaded") else "已卸载"
+            print(f"  {name} ({state}) - 加载增量: {mb(record.get('load_rss'))}，"
+                  f"最近调用增量: {mb(record.get('last_call_rss'))}，"
+                  f"当前占用: {mb(record.get('footprint'))}，调用次数: {record.get('calls', 0)}")
+    
     def _use_module(self, module_name):
         """使用指定模块"""
         module = self.get_module(module_name)
@@ -173,10 +510,124 @@ class ModuKit:
             
         try:
             # 调用模块的主方法
-            module.run()
+            with self.memory.measure(module_name):
+                module.run()
         except Exception as e:
             print(f"运行模块时出错: {e}")
+            
+        self._enforce_memory_budget(module_name)
+
+    def execute_command(self, argv, records=None):
+        """以非交互方式执行一条命令
+        
+        Args:
+            argv: 命令参数列表，例如 ['use', 'text_tools', 'a.txt']
+            records: 上一管道阶段输出的记录，没有则为None
+            
+        Returns:
+            可迭代的输出记录，没有输出则为None
+        """
+        cmd, args = argv[0], argv[1:]
+        
+        if cmd == "help":
+            self._show_help()
+            return None
+        elif cmd == "list":
+            return (dict(record) for record in self.list_modules())
+        elif cmd == "use":
+            if not args:
+                raise ValueError("缺少模块名称")
+            return self._stream_module(args[0], records, args[1:])
+        elif cmd == "cache":
+            return iter([self._cache_command(args)])
+        elif cmd == "memory":
+            return iter([self.memory_status(detail=True)])
+        else:
+            raise ValueError(f"未知命令: {cmd}")
+    
+    def _stream_module(self, module_name, records, args):
+        """以流的方式调用模块
+        
+        模块如果实现了 process(records, *args) 方法，则作为管道阶段调用，
+        否则回退到 run(*args)，此时不能接收上游记录。
+        """
+        module = self.get_module(module_name)
+        
+        if module is None:
+            raise ValueError(f"模块 '{module_name}' 不存在")
+            
+        if hasattr(module, "process"):
+            return self._measured_call(
+                module_name, module.process, iter(()) if records is None else records, *args
+            )
+            
+        if records is not None:
+            raise ValueError(f"模块 '{module_name}' 不支持管道输入")
+            
+        result = self._measured_call(module_name, module.run, *args)
+        if result is None:
+            return None
+        if isinstance(result, (str, bytes, dict)) or not hasattr(result, "__iter__"):
+            return [result]
+        return result
+    
+    def _measured_call(self, module_name, func, *args):
+        """调用模块方法并测量内存
+        
+        返回值是迭代器（例如生成器）时，模块的实际工作发生在输出被消费的过程中，
+        此时测量持续到迭代结束，之后再检查内存预算。
+        """
+        with contextlib.ExitStack() as stack:
+            stack.enter_context(self.memory.measure(module_name))
+            result = func(*args)
+            if isinstance(result, Iterator):
+                return self._measured_stream(module_name, result, stack.pop_all())
+                
+        self._enforce_memory_budget(module_name)
+        return result
+    
+    def _measured_stream(self, module_name, result, measurement):
+        """逐条转发模块输出，迭代结束或被关闭时结束测量"""
+        with measurement:
+            yield from result
+        self._enforce_memory_budget(module_name)
+    
+    def run_batch(self, commands, jobs=1, stop_on_error=False):
+        """批量执行命令
+        
+        Args:
+            commands: 命令文本列表
+            jobs: 并发执行的命令数
+            stop_on_error: 顺序执行时遇到错误是否立即停止
+            
+        Returns:
+            int: 失败的命令数
+        """
+        runner = BatchRunner(self.execute_command, jobs=jobs, stop_on_error=stop_on_error)
+        return runner.run(commands)
+
+def parse_arguments():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="ModuKit - 模块化工具箱")
+    parser.add_argument("-c", "--command", action="append", default=[],
+                        help="以批处理模式执行命令，可多次指定")
+    parser.add_argument("-f", "--script", type=str,
+                        help="从脚本文件读取命令，'-' 表示标准输入")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="并发执行的命令数")
+    parser.add_argument("--stop-on-error", action="store_true", help="遇到错误立即停止")
+    return parser.parse_args()
 
 if __name__ == "__main__":
+    args = parse_arguments()
+    commands = list(args.command)
+    if args.script:
+        commands.extend(read_script(args.script))
+        
+    if commands:
+        # 批处理模式下将加载信息输出到stderr，保持stdout只包含命令输出
+        with contextlib.redirect_stdout(sys.stderr):
+            app = ModuKit()
+        sys.exit(1 if app.run_batch(commands, args.jobs, args.stop_on_error) else 0)
+        
     app = ModuKit()
     app.run() 
\ No newline at end of file
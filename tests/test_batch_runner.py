@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+ModuKit - 批处理执行器测试
+"""
+
+import io
+import unittest
+from contextlib import redirect_stdout, redirect_stderr
+
+from backend.batch_runner import BatchRunner, parse_pipeline, format_record
+
+class ParsePipelineTest(unittest.TestCase):
+    """parse_pipeline 的分词和管道语法"""
+
+    def test_stages_and_quoting(self):
+        self.assertEqual(parse_pipeline('use a "x y" | use b|use c'),
+                         [['use', 'a', 'x y'], ['use', 'b'], ['use', 'c']])
+
+    def test_quoted_pipe_is_argument(self):
+        self.assertEqual(parse_pipeline("use a 'x|y'"), [['use', 'a', 'x|y']])
+
+    def test_empty_stage_is_error(self):
+        for line in ('use a |', '| use a', 'use a || use b', ''):
+            with self.assertRaises(ValueError):
+                parse_pipeline(line)
+
+    def test_format_record(self):
+        self.assertEqual(format_record('text'), 'text')
+        self.assertEqual(format_record(b'bytes'), 'bytes')
+        self.assertEqual(format_record({'名称': 1}), '{"名称": 1}')
+
+class BatchRunnerTest(unittest.TestCase):
+    """BatchRunner 的流式管道、并发输出和错误处理"""
+
+    def _run(self, execute, commands, **options):
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            failed = BatchRunner(execute, **options).run(commands)
+        return failed, stdout.getvalue(), stderr.getvalue()
+
+    def test_records_stream_between_stages(self):
+        events = []
+
+        def execute(argv, records):
+            if argv[0] == 'count':
+                def produce():
+                    for i in range(int(argv[1])):
+                        events.append(('produce', i))
+                        yield i
+                return produce()
+            if argv[0] == 'double':
+                def consume():
+                    for record in records:
+                        events.append(('consume', record))
+                        yield record * 2
+                return consume()
+            raise ValueError(f"未知命令: {argv[0]}")
+
+        failed, out, _ = self._run(execute, ['count 2 | double'])
+
+        self.assertEqual(failed, 0)
+        self.assertEqual(out.splitlines(), ['0', '2'])
+        self.assertEqual(events, [('produce', 0), ('consume', 0), ('produce', 1), ('consume', 1)])
+
+    def test_parallel_jobs_prefix_whole_lines(self):
+        def execute(argv, records):
+            print(f"{argv[1]}-a")
+            return [f"{argv[1]}-b"]
+
+        failed, out, _ = self._run(execute, [f'echo {i}' for i in range(1, 6)], jobs=3)
+
+        self.assertEqual(failed, 0)
+        self.assertEqual(sorted(out.splitlines()),
+                         sorted(f"[{i}] {i}-{part}" for i in range(1, 6) for part in 'ab'))
+
+    def test_errors_are_counted_and_reported(self):
+        def execute(argv, records):
+            if argv[0] == 'fail':
+                raise ValueError("出错了")
+            return [argv[0]]
+
+        failed, out, err = self._run(execute, ['ok', 'fail', 'ok | fail', 'ok'])
+
+        self.assertEqual(failed, 2)
+        self.assertEqual(out.splitlines(), ['ok', 'ok'])
+        self.assertIn('命令执行失败: fail: 出错了', err)
+
+    def test_stop_on_error(self):
+        executed = []
+
+        def execute(argv, records):
+            executed.append(argv[0])
+            if argv[0] == 'fail':
+                raise ValueError("出错了")
+            return None
+
+        failed, _, _ = self._run(execute, ['a', 'fail', 'b'], stop_on_error=True)
+
+        self.assertEqual(failed, 1)
+        self.assertEqual(executed, ['a', 'fail'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+ModuKit - 文件存储测试
+"""
+
+import io
+import time
+import tempfile
+import threading
+import unittest
+
+from backend.file_store import FileStore, UploadOffsetError
+
+class FileStoreTest(unittest.TestCase):
+    """FileStore 的分段上传和断点续传"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = FileStore(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _write(self, data, offset=0, total=None, ranged=False, length=None):
+        return self.store.write_stream('data.bin', io.BytesIO(data), offset, total, ranged, length)
+
+    def test_whole_file_upload_completes(self):
+        self.assertEqual(self._write(b'hello'), (5, True))
+        self.assertEqual(self.store.path('data.bin').read_bytes(), b'hello')
+        self.assertEqual(self.store.received('data.bin'), 0)
+
+    def test_segments_complete_at_total(self):
+        self.assertEqual(self._write(b'hel', 0, 5, ranged=True), (3, False))
+        self.assertFalse(self.store.path('data.bin').exists())
+        self.assertEqual(self._write(b'lo', 3, 5, ranged=True), (5, True))
+        self.assertEqual(self.store.path('data.bin').read_bytes(), b'hello')
+
+    def test_unknown_length_waits_for_final_segment(self):
+        self.assertEqual(self._write(b'hel', 0, None, ranged=True), (3, False))
+        self.assertEqual(self._write(b'lo ', 3, None, ranged=True), (6, False))
+        self.assertFalse(self.store.path('data.bin').exists())
+        self.assertEqual(self._write(b'you', 6, 9, ranged=True), (9, True))
+        self.assertEqual(self.store.path('data.bin').read_bytes(), b'hello you')
+
+    def test_offset_mismatch_reports_received(self):
+        self._write(b'hel', 0, 5, ranged=True)
+        with self.assertRaises(UploadOffsetError) as ctx:
+            self._write(b'o', 4, 5, ranged=True)
+        self.assertEqual(ctx.exception.received, 3)
+
+    def test_restart_at_zero_discards_partial(self):
+        self._write(b'stale', 0, 10, ranged=True)
+        self.assertEqual(self._write(b'new', 0, 6, ranged=True), (3, False))
+        self.assertEqual(self._write(b'abc', 3, 6, ranged=True), (6, True))
+        self.assertEqual(self.store.path('data.bin').read_bytes(), b'newabc')
+
+    def test_rejects_data_beyond_total(self):
+        self._write(b'hel', 0, 5, ranged=True)
+        with self.assertRaises(ValueError):
+            self._write(b'lo!', 3, 5, ranged=True)
+        self.assertFalse(self.store.path('data.bin').exists())
+        self.assertEqual(self.store.received('data.bin'), 3)
+
+    def test_rejects_length_mismatch(self):
+        self._write(b'hel', 0, 6, ranged=True, length=3)
+        for data in (b'l', b'lo!!'):
+            with self.assertRaises(ValueError):
+                self._write(data, 3, 6, ranged=True, length=2)
+            self.assertEqual(self.store.received('data.bin'), 3)
+        self.assertEqual(self._write(b'lo!', 3, 6, ranged=True, length=3), (6, True))
+
+    def test_concurrent_writes_are_serialized(self):
+        class SlowStream:
+            def __init__(self, data):
+                self.chunks = [bytes([b]) for b in data]
+
+            def read(self, size):
+                time.sleep(0.005)
+                return self.chunks.pop(0) if self.chunks else b''
+
+        threads = [
+            threading.Thread(target=self.store.write_stream,
+                             args=('data.bin', SlowStream(data), 0, 8, True))
+            for data in (b'aaaaaaaa', b'bbbbbbbb')
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertIn(self.store.path('data.bin').read_bytes(), (b'aaaaaaaa', b'bbbbbbbb'))
+
+    def test_rejects_path_names(self):
+        for name in ('../x', 'a/b', '.partial', ''):
+            with self.assertRaises(ValueError):
+                self.store.path(name)
+
+    def test_list_and_delete(self):
+        self._write(b'hello')
+        self.assertEqual(self.store.list_files(), [{'name': 'data.bin', 'size': 5}])
+        self.assertTrue(self.store.delete('data.bin'))
+        self.assertFalse(self.store.delete('data.bin'))
+        self.assertEqual(self.store.list_files(), [])
+
+if __name__ == '__main__':
+    unittest.main()
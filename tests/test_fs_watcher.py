@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+ModuKit - 文件系统监视服务测试
+"""
+
+import os
+import time
+import errno
+import shutil
+import tempfile
+import threading
+import unittest
+
+from backend.fs_watcher import FileWatcher, CREATED, MODIFIED, DELETED
+
+class FileWatcherTest(unittest.TestCase):
+    """轮询模式下 FileWatcher 的事件合并、目录删除和检查点补发"""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.root = os.path.join(self.tmp, 'watched')
+        os.makedirs(self.root)
+        self.checkpoint = os.path.join(self.tmp, 'checkpoint.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _watcher(self, **options):
+        options.setdefault('debounce', 0.05)
+        options.setdefault('poll_interval', 0.05)
+        watcher = FileWatcher(checkpoint_path=self.checkpoint, use_inotify=False, **options)
+        self.addCleanup(watcher.stop)
+        return watcher
+
+    def _write(self, name, data):
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(data)
+        return path
+
+    def _collector(self):
+        batches = []
+        received = threading.Event()
+
+        def callback(batch):
+            batches.append(batch)
+            received.set()
+
+        return batches, received, callback
+
+    def test_created_then_deleted_is_dropped(self):
+        watcher = self._watcher()
+        watcher._add_root(self.root, True)
+        path = os.path.join(self.root, 'a.txt')
+
+        watcher._record(path, (1, 1))
+        watcher._record(path, None)
+        self.assertEqual(watcher._pending, {})
+
+    def test_deleted_then_created_is_modified(self):
+        path = self._write('a.txt', 'x')
+        watcher = self._watcher()
+        watcher._add_root(self.root, True)
+
+        watcher._record(path, None)
+        watcher._record(path, (1, 2))
+        self.assertEqual(watcher._pending, {path: MODIFIED})
+
+    def test_deleted_directory_uses_index(self):
+        nested = self._write(os.path.join('sub', 'deep', 'b.txt'), 'b')
+        child = self._write(os.path.join('sub', 'a.txt'), 'a')
+        other = self._write('c.txt', 'c')
+        watcher = self._watcher()
+        watcher._add_root(self.root, True)
+
+        shutil.rmtree(os.path.join(self.root, 'sub'))
+        watcher._check_path(os.path.join(self.root, 'sub'))
+
+        self.assertEqual(watcher._pending, {nested: DELETED, child: DELETED})
+        self.assertIn(other, watcher._snapshot)
+        self.assertNotIn(os.path.join(self.root, 'sub'), watcher._children)
+
+    def test_polling_dispatches_batched_changes(self):
+        existing = self._write('old.txt', 'x')
+        batches, received, callback = self._collector()
+        watcher = self._watcher()
+        watcher.watch(self.root, callback)
+        watcher.start()
+
+        created = self._write('new.txt', 'y')
+        os.unlink(existing)
+        self.assertTrue(received.wait(5))
+        self.assertEqual(set(batches[0]), {(CREATED, created), (DELETED, existing)})
+
+    def test_checkpoint_replays_offline_changes(self):
+        kept = self._write('kept.txt', 'x')
+        changed = self._write('changed.txt', 'x')
+        removed = self._write('removed.txt', 'x')
+
+        first = self._watcher()
+        first.watch(self.root, lambda batch: None)
+        first.start()
+        first.stop()
+
+        with open(changed, 'w') as f:
+            f.write('longer')
+        os.unlink(removed)
+        added = self._write('added.txt', 'x')
+
+        batches, received, callback = self._collector()
+        second = self._watcher()
+        second.watch(self.root, callback)
+        second.start()
+
+        self.assertEqual(set(batches[0]), {(CREATED, added), (MODIFIED, changed), (DELETED, removed)})
+        self.assertNotIn(kept, [path for _, path in batches[0]])
+
+    def test_journal_is_applied_on_load(self):
+        path = self._write('a.txt', 'x')
+        watcher = self._watcher()
+        watcher.watch(self.root, lambda batch: None)
+        watcher.start()
+
+        added = self._write('b.txt', 'y')
+        os.unlink(path)
+        with watcher._lock:
+            watcher._poll()
+            watcher._save_checkpoint()
+        self.assertTrue(os.path.exists(watcher.journal_path))
+
+        files = FileWatcher(checkpoint_path=self.checkpoint, use_inotify=False)._checkpoint['files']
+        self.assertIn(added, files)
+        self.assertNotIn(path, files)
+
+        watcher.stop()
+        self.assertFalse(os.path.exists(watcher.journal_path))
+
+    def test_configure_before_and_after_start(self):
+        watcher = FileWatcher(checkpoint_path=self.checkpoint, use_inotify=True)
+        self.addCleanup(watcher.stop)
+        watcher.configure(use_inotify=False, debounce=0.05, poll_interval=0.05)
+        watcher.start()
+        self.assertEqual(watcher.mode, 'polling')
+
+        watcher.configure(use_inotify=True, debounce=0.2)
+        self.assertEqual(watcher.debounce, 0.2)
+        self.assertFalse(watcher.use_inotify)
+        with self.assertRaises(TypeError):
+            watcher.configure(unknown=1)
+
+    def test_watch_limit_falls_back_to_polling(self):
+        watcher = FileWatcher(checkpoint_path=self.checkpoint, use_inotify=True,
+                              debounce=0.05, poll_interval=0.05)
+        self.addCleanup(watcher.stop)
+        watcher.start()
+        if watcher.mode != 'inotify':
+            self.skipTest("inotify不可用")
+
+        def add(path):
+            raise OSError(errno.ENOSPC, os.strerror(errno.ENOSPC), path)
+        watcher._inotify.add = add
+
+        batches, received, callback = self._collector()
+        watcher.watch(self.root, callback)
+        self.assertIn(self.root, watcher._polled_roots)
+
+        created = self._write('new.txt', 'x')
+        self.assertTrue(received.wait(5))
+        self.assertEqual(batches[0], [(CREATED, created)])
+
+    def test_slow_callback_does_not_block_watch(self):
+        release = threading.Event()
+        entered = threading.Event()
+
+        def slow(batch):
+            entered.set()
+            release.wait(5)
+
+        watcher = self._watcher()
+        watcher.watch(self.root, slow)
+        watcher.start()
+        self.addCleanup(release.set)
+        self._write('a.txt', 'x')
+        self.assertTrue(entered.wait(5))
+
+        other = os.path.join(self.tmp, 'other')
+        os.makedirs(other)
+        batches, received, callback = self._collector()
+        done = threading.Event()
+        threading.Thread(target=lambda: (watcher.watch(other, callback), done.set()),
+                         daemon=True).start()
+        self.assertTrue(done.wait(2))
+
+        self._write('b.txt', 'y')
+        time.sleep(0.3)
+        self.assertIn(os.path.join(self.root, 'b.txt'), watcher._snapshot)
+        release.set()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+ModuKit - 内存监控与内存预算测试
+"""
+
+import time
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import main
+from main import ModuKit
+from backend import memory_monitor
+from backend.memory_monitor import MemoryMonitor
+from backend.module_registry import ModuleRegistry
+from backend.result_cache import ResultCache
+
+class MemoryMonitorTest(unittest.TestCase):
+    """MemoryMonitor 的测量记录和预算判断"""
+
+    def test_measure_records_load_and_calls(self):
+        monitor = MemoryMonitor()
+        with monitor.measure('a', 'load'):
+            pass
+        with monitor.measure('a'):
+            pass
+        with monitor.measure('a'):
+            pass
+
+        record = monitor.summary()['modules']['a']
+        self.assertEqual(record['calls'], 2)
+        self.assertIsNotNone(record['load_rss'])
+        self.assertIsNotNone(record['last_call_rss'])
+
+    def test_idle_modules_oldest_first(self):
+        monitor = MemoryMonitor()
+        monitor.touch('old')
+        time.sleep(0.01)
+        monitor.touch('new')
+
+        self.assertEqual(monitor.idle_modules(), ['old', 'new'])
+        self.assertEqual(monitor.idle_modules(min_idle=60), [])
+
+    def test_over_budget(self):
+        monitor = MemoryMonitor(budget_bytes=100)
+        with mock.patch.object(memory_monitor, 'current_rss', return_value=200):
+            self.assertTrue(monitor.over_budget())
+        with mock.patch.object(memory_monitor, 'current_rss', return_value=50):
+            self.assertFalse(monitor.over_budget())
+        self.assertFalse(MemoryMonitor(budget_bytes=0).over_budget())
+
+class _Instance:
+    def __init__(self):
+        self.unloaded = False
+
+    def unload(self):
+        self.unloaded = True
+
+class MemoryBudgetTest(unittest.TestCase):
+    """ModuKit 超出内存预算时卸载空闲模块"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.rss = [1000]
+
+        kit = ModuKit.__new__(ModuKit)
+        kit.config = {"memory": {"idle_seconds": 0, "enforce_interval": 60}}
+        kit.memory = MemoryMonitor(budget_bytes=500)
+        kit.modules = ModuleRegistry()
+        kit._modules_lock = threading.RLock()
+        kit.cache = ResultCache(db_path=Path(self.tmp.name) / "cache.db")
+        kit._next_budget_check = 0.0
+        self.kit = kit
+        self.instances = {}
+        for name in ('a', 'b', 'c'):
+            self.instances[name] = _Instance()
+            kit.modules.add(name, None, None, self.instances[name])
+            kit.memory.touch(name)
+            time.sleep(0.01)
+
+        rss = lambda: self.rss[0]
+        for target in (main, memory_monitor):
+            patcher = mock.patch.object(target, 'current_rss', side_effect=rss)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.kit.cache.close()
+        self.tmp.cleanup()
+
+    def test_stops_when_rss_does_not_drop(self):
+        self.assertEqual(self.kit._enforce_memory_budget(), ['a'])
+        self.assertTrue(self.instances['a'].unloaded)
+        self.assertFalse(self.instances['b'].unloaded)
+
+    def test_rate_limited(self):
+        self.kit._enforce_memory_budget()
+        self.assertEqual(self.kit._enforce_memory_budget(), [])
+        self.assertFalse(self.instances['b'].unloaded)
+
+    def test_unloads_until_under_budget(self):
+        def unload_a():
+            self.rss[0] = 800
+        def unload_b():
+            self.rss[0] = 400
+        self.instances['a'].unload = unload_a
+        self.instances['b'].unload = unload_b
+
+        self.assertEqual(self.kit._enforce_memory_budget(active='c'), ['a', 'b'])
+
+    def test_budget_unload_keeps_disk_cache(self):
+        self.kit.cache.set('k', 1, namespace='a')
+        self.kit._enforce_memory_budget()
+
+        self.assertEqual(len(self.kit.cache._memory), 0)
+        self.assertEqual(self.kit.cache.get('k'), (True, 1))
+
+    def test_code_change_unload_clears_disk_cache(self):
+        self.kit.cache.set('k', 1, namespace='a')
+        self.kit.unload_module('a')
+
+        self.assertEqual(self.kit.cache.get('k'), (False, None))
+
+if __name__ == '__main__':
+    unittest.main()
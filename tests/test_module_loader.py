@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+ModuKit - 模块初始化调度器测试
+"""
+
+import sys
+import time
+import asyncio
+import threading
+import unittest
+import subprocess
+from pathlib import Path
+
+from backend.module_loader import ParallelInitializer, ModuleInitError, call_init
+
+class ParallelInitializerTest(unittest.TestCase):
+    """ParallelInitializer 的依赖顺序和失败传播"""
+
+    def _recording_tasks(self, names, delay=0.0):
+        """创建记录开始和结束顺序的任务"""
+        events = []
+        lock = threading.Lock()
+
+        def make(name):
+            def task():
+                with lock:
+                    events.append(('start', name))
+                time.sleep(delay)
+                with lock:
+                    events.append(('end', name))
+                return name.upper()
+            return task
+
+        return {name: make(name) for name in names}, events
+
+    def test_dependencies_finish_before_dependents(self):
+        tasks, events = self._recording_tasks(['a', 'b', 'c', 'd'], delay=0.01)
+        dependencies = {'c': ['a', 'b'], 'd': ['c']}
+
+        results, errors = ParallelInitializer(max_workers=4).run(tasks, dependencies)
+
+        self.assertEqual(errors, {})
+        self.assertEqual(results, {'a': 'A', 'b': 'B', 'c': 'C', 'd': 'D'})
+        for child, parents in dependencies.items():
+            for parent in parents:
+                self.assertLess(events.index(('end', parent)), events.index(('start', child)))
+
+    def test_independent_modules_run_concurrently(self):
+        tasks, _ = self._recording_tasks(['a', 'b', 'c', 'd'], delay=0.2)
+
+        began = time.monotonic()
+        results, errors = ParallelInitializer(max_workers=4).run(tasks, {})
+
+        self.assertEqual(len(results), 4)
+        self.assertLess(time.monotonic() - began, 0.6)
+
+    def test_failure_skips_transitive_dependents(self):
+        def broken():
+            raise RuntimeError("boom")
+
+        tasks = {'a': broken, 'b': lambda: 'b', 'c': lambda: 'c', 'd': lambda: 'd'}
+        dependencies = {'b': ['a'], 'c': ['b'], 'd': []}
+
+        results, errors = ParallelInitializer().run(tasks, dependencies)
+
+        self.assertEqual(results, {'d': 'd'})
+        self.assertIsInstance(errors['a'], RuntimeError)
+        self.assertIsInstance(errors['b'], ModuleInitError)
+        self.assertIsInstance(errors['c'], ModuleInitError)
+
+    def test_timeout_marks_module_and_dependents_failed(self):
+        tasks = {'slow': lambda: time.sleep(0.5), 'child': lambda: 'child', 'fast': lambda: 'fast'}
+        dependencies = {'child': ['slow']}
+
+        began = time.monotonic()
+        results, errors = ParallelInitializer(timeout=5).run(
+            tasks, dependencies, timeouts={'slow': 0.1})
+
+        self.assertLess(time.monotonic() - began, 0.4)
+        self.assertEqual(results, {'fast': 'fast'})
+        self.assertIn('超时', str(errors['slow']))
+        self.assertIn('child', errors)
+
+    def test_timed_out_init_does_not_block_exit(self):
+        script = (
+            "import time\n"
+            "from backend.module_loader import ParallelInitializer\n"
+            "ParallelInitializer().run({'hung': lambda: time.sleep(30)}, {}, {'hung': 0.1})\n"
+        )
+        began = time.monotonic()
+        subprocess.run([sys.executable, '-c', script], check=True, timeout=20,
+                       cwd=Path(__file__).parent.parent)
+        self.assertLess(time.monotonic() - began, 10)
+
+    def test_missing_dependency_and_cycle(self):
+        tasks = {'a': lambda: 'a', 'b': lambda: 'b', 'x': lambda: 'x', 'ok': lambda: 'ok'}
+        dependencies = {'a': ['b'], 'b': ['a'], 'x': ['missing']}
+
+        results, errors = ParallelInitializer().run(tasks, dependencies)
+
+        self.assertEqual(results, {'ok': 'ok'})
+        self.assertIn('循环依赖', str(errors['a']))
+        self.assertIn('循环依赖', str(errors['b']))
+        self.assertIn('missing', str(errors['x']))
+
+class CallInitTest(unittest.TestCase):
+    """call_init 对普通函数和协程函数的支持"""
+
+    def test_plain_function(self):
+        self.assertEqual(call_init(lambda: 42), 42)
+
+    def test_coroutine_function(self):
+        async def init():
+            await asyncio.sleep(0)
+            return 'done'
+
+        self.assertEqual(call_init(init), 'done')
+
+if __name__ == '__main__':
+    unittest.main()
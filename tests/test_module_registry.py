@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+ModuKit - 模块注册表测试
+"""
+
+import json
+import unittest
+
+from backend.module_registry import ModuleRegistry
+
+class _Info:
+    def __init__(self, title, version='1.0'):
+        self.name = title
+        self.version = version
+        self.description = f"{title} 模块"
+        self.author = 'ModuKit'
+
+class ModuleRegistryTest(unittest.TestCase):
+    """ModuleRegistry 的版本号、视图缓存和只读摘要"""
+
+    def setUp(self):
+        self.registry = ModuleRegistry()
+        self.registry.add('a', _Info('文本'), None, None)
+        self.registry.add('b', _Info('文件'), None, None)
+
+    def test_add_and_remove_bump_version(self):
+        version = self.registry.version
+        self.registry.add('c', _Info('c'), None, None)
+        self.assertEqual(self.registry.version, version + 1)
+
+        self.assertIsNotNone(self.registry.remove('c'))
+        self.assertEqual(self.registry.version, version + 2)
+
+        self.assertIsNone(self.registry.remove('missing'))
+        self.assertEqual(self.registry.version, version + 2)
+
+    def test_views_are_cached_until_changed(self):
+        names = self.registry.names()
+        records = self.registry.records()
+        self.assertIs(self.registry.names(), names)
+        self.assertIs(self.registry.records(), records)
+        self.assertEqual(names, ('a', 'b'))
+
+        self.registry.remove('a')
+        self.assertEqual(self.registry.names(), ('b',))
+        self.assertEqual([r['name'] for r in self.registry.records()], ['b'])
+
+    def test_json_and_etag(self):
+        body, etag = self.registry.to_json()
+        self.assertEqual([m['id'] for m in json.loads(body)], ['a', 'b'])
+        self.assertEqual(json.loads(body)[0]['name'], '文本')
+
+        other = ModuleRegistry()
+        other.add('a', _Info('文本'), None, None)
+        other.add('b', _Info('文件'), None, None)
+        self.assertEqual(other.to_json()[1], etag)
+
+        self.registry.add('b', _Info('文件', version='2.0'), None, None)
+        self.assertNotEqual(self.registry.to_json()[1], etag)
+
+    def test_records_are_read_only(self):
+        record = self.registry.records()[0]
+        with self.assertRaises(TypeError):
+            record['name'] = 'changed'
+        self.assertEqual(dict(record)['name'], 'a')
+
+    def test_instance_changes_do_not_bump_version(self):
+        version = self.registry.version
+        self.registry.get('a').instance = object()
+        self.assertEqual(self.registry.version, version)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+ModuKit - 结果缓存测试
+"""
+
+import os
+import time
+import tempfile
+import unittest
+from pathlib import Path
+
+from backend import result_cache
+from backend.result_cache import ResultCache, configure_cache, cached
+
+class ResultCacheTest(unittest.TestCase):
+    """ResultCache 的过期、淘汰和持久化"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        # 清理函数后注册先执行，缓存在删除临时目录前关闭
+        self.addCleanup(self.tmp.cleanup)
+        self.db_path = Path(self.tmp.name) / "cache.db"
+
+    def _cache(self, **options):
+        cache = ResultCache(db_path=self.db_path, **options)
+        self.addCleanup(cache.close)
+        return cache
+
+    def test_expired_entries_are_misses(self):
+        cache = self._cache()
+        cache.set('k', 'v', ttl=0.05)
+        self.assertEqual(cache.get('k'), (True, 'v'))
+
+        time.sleep(0.1)
+        self.assertEqual(cache.get('k'), (False, None))
+        self.assertEqual(cache.stats()['disk_entries'], 0)
+
+    def test_memory_tier_evicts_least_recently_used(self):
+        cache = ResultCache(max_entries=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEqual(cache.get('b'), (False, None))
+        self.assertEqual(cache.get('a'), (True, 1))
+        self.assertEqual(cache.get('c'), (True, 3))
+
+    def test_disk_tier_stays_under_size_limit(self):
+        cache = self._cache(max_entries=1, max_disk_bytes=3000)
+        for i in range(10):
+            cache.set(f'k{i}', b'x' * 1000)
+
+        stats = cache.stats()
+        self.assertLessEqual(stats['disk_bytes'], 3000)
+        self.assertGreater(stats['disk_entries'], 0)
+        self.assertEqual(cache.get('k0'), (False, None))
+        self.assertEqual(cache.get('k9'), (True, b'x' * 1000))
+
+    def test_disk_counters_follow_replacements(self):
+        cache = self._cache()
+        cache.set('k', b'x' * 100)
+        cache.set('k', b'x' * 10)
+        cache.set('other', b'y')
+
+        stats = cache.stats()
+        self.assertEqual(stats['disk_entries'], 2)
+        self.assertEqual(stats['disk_bytes'], cache._db.execute(
+            "SELECT SUM(size) FROM cache").fetchone()[0])
+
+    def test_disk_hits_update_access_time_in_batches(self):
+        cache = self._cache(max_entries=1, max_disk_bytes=10 ** 6)
+        cache.set('a', b'a')
+        cache.set('b', b'b')
+        accessed = lambda: cache._db.execute(
+            "SELECT accessed FROM cache WHERE key = 'a'").fetchone()[0]
+        before = accessed()
+
+        time.sleep(0.01)
+        self.assertEqual(cache.get('a'), (True, b'a'))
+        self.assertEqual(accessed(), before)
+
+        cache.max_disk_bytes = cache.stats()['disk_bytes']
+        cache.set('c', b'c')
+        self.assertGreater(accessed(), before)
+        self.assertEqual(cache.get('a'), (True, b'a'))
+        self.assertEqual(cache.get('b'), (False, None))
+
+    def test_entries_persist_across_instances(self):
+        cache = self._cache()
+        cache.set('k', {'rows': [1, 2]})
+        cache.close()
+
+        reopened = self._cache()
+        self.assertEqual(reopened.get('k'), (True, {'rows': [1, 2]}))
+        self.assertEqual(reopened.stats()['disk_entries'], 1)
+
+    def test_hits_return_independent_copies(self):
+        cache = self._cache()
+        value = {'rows': [1, 2]}
+        cache.set('k', value)
+        value['rows'].append(3)
+
+        hit, first = cache.get('k')
+        first['rows'].append(4)
+        self.assertEqual(cache.get('k'), (True, {'rows': [1, 2]}))
+
+    def test_unpicklable_values_are_not_cached(self):
+        cache = self._cache()
+        self.assertFalse(cache.set('k', lambda: None))
+        self.assertEqual(cache.get('k'), (False, None))
+
+    def test_invalidate_namespace(self):
+        cache = self._cache()
+        cache.set('a', 1, namespace='one')
+        cache.set('b', 2, namespace='two')
+        cache.invalidate('one')
+
+        self.assertEqual(cache.get('a'), (False, None))
+        self.assertEqual(cache.get('b'), (True, 2))
+        self.assertEqual(cache.stats()['disk_entries'], 1)
+
+class CachedDecoratorTest(unittest.TestCase):
+    """@cached 装饰器按参数和输入文件生成缓存键"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        configure_cache(db_path=Path(self.tmp.name) / "cache.db")
+
+    def tearDown(self):
+        result_cache._cache.close()
+        result_cache._cache = None
+        self.tmp.cleanup()
+
+    def test_file_change_invalidates_result(self):
+        calls = []
+
+        @cached(files=('path',), namespace='test')
+        def line_count(path):
+            calls.append(path)
+            with open(path) as f:
+                return len(f.readlines())
+
+        path = os.path.join(self.tmp.name, 'input.txt')
+        with open(path, 'w') as f:
+            f.write("a\nb\n")
+
+        self.assertEqual(line_count(path), 2)
+        self.assertEqual(line_count(path), 2)
+        self.assertEqual(len(calls), 1)
+
+        with open(path, 'w') as f:
+            f.write("a\nb\nc\n")
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000))
+
+        self.assertEqual(line_count(path), 3)
+        self.assertEqual(len(calls), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,457 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+ModuKit - 负载测试工具
+生成模拟模块，在本地端口启动真实的服务器（index.start_server），
+逐步提高并发并记录吞吐量、错误率和延迟分布，自动找出饱和点，
+并可与基线报告比较，性能退化时返回非零退出码
+
+用法:
+    python tools/load_test.py --output report.json
+    python tools/load_test.py --baseline baseline.json --tolerance 0.1
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import socket
+import shutil
+import asyncio
+import argparse
+import tempfile
+import platform
+import subprocess
+from pathlib import Path
+from datetime import datetime
+
+# 获取项目根目录
+ROOT_DIR = Path(__file__).parent.parent.absolute()
+
+# 复制到临时工作目录中的应用文件
+APP_FILES = ["index.py", "main.py", "backend", "static", "config"]
+
+# 模拟模块的代码模板，cost_ms 为每次调用的目标耗时
+STUB_TEMPLATE = '''#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""负载测试模拟模块 ({profile})"""
+
+import time
+import hashlib
+import tempfile
+
+class ModuleInfo:
+    name = "{name}"
+    version = "0.0.1"
+    description = "负载测试模拟模块，类型: {profile}，耗时: {cost_ms}ms"
+    author = "load_test"
+
+class Module:
+    profile = "{profile}"
+    cost_ms = {cost_ms}
+
+    def _cpu(self, seconds):
+        deadline = time.perf_counter() + seconds
+        digest = b"modukit"
+        while time.perf_counter() < deadline:
+            digest = hashlib.sha256(digest).digest()
+        return digest.hex()[:8]
+
+    def _io(self, seconds):
+        with tempfile.TemporaryFile() as f:
+            f.write(b"x" * 65536)
+            f.flush()
+            f.seek(0)
+            f.read()
+        time.sleep(seconds)
+
+    def run(self, *args):
+        seconds = self.cost_ms / 1000
+        if self.profile == "cpu":
+            self._cpu(seconds)
+        elif self.profile == "io":
+            self._io(seconds)
+        else:
+            self._cpu(seconds / 2)
+            self._io(seconds / 2)
+        return {{"module": "{name}", "profile": self.profile, "args": list(args)}}
+'''
+
+def parse_arguments():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="ModuKit 负载测试工具")
+    parser.add_argument("--modules", type=int, default=12, help="生成的模拟模块数量")
+    parser.add_argument("--profiles", type=str, default="cpu:5,io:20,mixed:10",
+                        help="模块开销类型及耗时（毫秒），模块按顺序轮流使用，例如 cpu:5,io:20")
+    parser.add_argument("--mix", type=str, default="api:0.4,static:0.2,module:0.4",
+                        help="请求类型比例，可选 api、static、module")
+    parser.add_argument("--concurrency", type=str, default="1,2,4,8,16,32,64,128",
+                        help="逐级测试的并发数")
+    parser.add_argument("--duration", type=float, default=5.0, help="每级并发的测试时长（秒）")
+    parser.add_argument("--warmup", type=float, default=1.0, help="每级并发开始时不计入统计的时长（秒）")
+    parser.add_argument("--timeout", type=float, default=10.0, help="单个请求的超时时间（秒）")
+    parser.add_argument("--min-gain", type=float, default=0.05,
+                        help="并发提高后吞吐量增幅低于此比例视为趋于饱和")
+    parser.add_argument("--patience", type=int, default=2,
+                        help="连续多少级没有明显提升时停止加压")
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="允许的最大错误率")
+    parser.add_argument("--port", type=int, default=0, help="服务器端口，0表示自动选择")
+    parser.add_argument("--output", type=str, help="报告输出路径（JSON）")
+    parser.add_argument("--baseline", type=str, help="基线报告路径，用于检测性能退化")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="与基线比较时允许的波动比例")
+    parser.add_argument("--min-throughput", type=float, help="饱和点吞吐量下限（请求/秒）")
+    parser.add_argument("--max-p99", type=float, help="饱和点p99延迟上限（毫秒）")
+    parser.add_argument("--seed", type=int, default=0, help="随机数种子")
+    parser.add_argument("--keep-workspace", action="store_true", help="保留临时工作目录")
+    return parser.parse_args()
+
+def parse_weights(text):
+    """解析 "名称:数值,..." 格式的参数"""
+    result = []
+    for item in text.split(","):
+        name, _, value = item.strip().partition(":")
+        if name:
+            result.append((name.strip(), float(value) if value else 1.0))
+    return result
+
+def create_workspace(module_count, profiles):
+    """创建临时工作目录，复制应用文件并生成模拟模块
+
+    Returns:
+        tuple: (工作目录, 模块名列表)
+    """
+    workspace = Path(tempfile.mkdtemp(prefix="modukit_load_"))
+    for name in APP_FILES:
+        source = ROOT_DIR / name
+        if source.is_dir():
+            shutil.copytree(source, workspace / name,
+                            ignore=shutil.ignore_patterns("__pycache__"))
+        elif source.exists():
+            shutil.copy2(source, workspace / name)
+
+    (workspace / "logs").mkdir(exist_ok=True)
+    modules_dir = workspace / "modules"
+    modules_dir.mkdir()
+    (modules_dir / "__init__.py").write_text("", encoding="utf-8")
+
+    names = []
+    for i in range(module_count):
+        profile, cost_ms = profiles[i % len(profiles)]
+        name = f"stub_{profile}_{i:03d}"
+        module_dir = modules_dir / name
+        module_dir.mkdir()
+        (module_dir / "__init__.py").write_text(
+            STUB_TEMPLATE.format(name=name, profile=profile, cost_ms=int(cost_ms)),
+            encoding="utf-8"
+        )
+        names.append(name)
+
+    return workspace, names
+
+def find_free_port():
+    """获取一个空闲的本地端口"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_server(workspace, port):
+    """在子进程中通过 index.start_server 启动服务器，返回进程对象"""
+    code = (
+        "import sys; sys.argv = ['index.py']; "
+        "import index; "
+        f"index.start_server({port}, False)"
+    )
+    log = open(workspace / "logs" / "load_test_server.log", "w", encoding="utf-8")
+    return subprocess.Popen([sys.executable, "-c", code], cwd=str(workspace),
+                            stdout=log, stderr=subprocess.STDOUT)
+
+def wait_for_server(port, process, timeout=60):
+    """等待服务器开始响应"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"服务器进程已退出，退出码: {process.returncode}")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1) as s:
+                s.sendall(b"GET /api/status HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n")
+                if s.recv(12).startswith(b"HTTP/1.1 200"):
+                    return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("等待服务器启动超时")
+
+async def http_request(reader, writer, method, path, body=None):
+    """在已建立的连接上发送HTTP/1.1请求并读取完整响应
+
+    Returns:
+        tuple: (状态码, 服务器是否要求关闭连接)
+    """
+    head = f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nConnection: keep-alive\r\n"
+    if body is not None:
+        head += f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+    writer.write(head.encode("latin-1") + b"\r\n" + (body or b""))
+    await writer.drain()
+
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("连接已关闭")
+    status = int(status_line.split()[1])
+
+    length = None
+    chunked = False
+    close = False
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        name = name.strip().lower()
+        value = value.strip().lower()
+        if name == "content-length":
+            length = int(value)
+        elif name == "transfer-encoding" and "chunked" in value:
+            chunked = True
+        elif name == "connection" and value == "close":
+            close = True
+
+    if chunked:
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    elif length is not None:
+        await reader.readexactly(length)
+    elif status not in (204, 304) and method != "HEAD":
+        await reader.read()
+        close = True
+
+    return status, close
+
+class Workload:
+    """按比例随机生成请求"""
+
+    def __init__(self, mix, module_names, seed=0):
+        self.kinds = [name for name, _ in mix]
+        self.weights = [weight for _, weight in mix]
+        self.module_names = module_names
+        self.random = random.Random(seed)
+
+    def next_request(self):
+        """返回 (类型, 方法, 路径, 请求体)"""
+        kind = self.random.choices(self.kinds, self.weights)[0]
+        if kind == "api":
+            path = self.random.choice(["/api/status", "/api/modules"])
+            return kind, "GET", path, None
+        if kind == "static":
+            path = self.random.choice(["/", "/static/logo.ico"])
+            return kind, "GET", path, None
+        if kind == "module":
+            name = self.random.choice(self.module_names)
+            body = json.dumps({"args": [str(self.random.randint(0, 1000))]}).encode("utf-8")
+            return kind, "POST", f"/api/modules/{name}/run", body
+        raise ValueError(f"未知的请求类型: {kind}")
+
+async def client(port, workload, start_time, end_time, timeout, samples):
+    """单个异步客户端，使用长连接持续发送请求直到结束时间"""
+    connection = None
+    while time.monotonic() < end_time:
+        kind, method, path, body = workload.next_request()
+        began = time.monotonic()
+        ok = False
+        try:
+            if connection is None:
+                connection = await asyncio.wait_for(
+                    asyncio.open_connection("127.0.0.1", port), timeout)
+            status, close = await asyncio.wait_for(
+                http_request(*connection, method, path, body), timeout)
+            ok = status < 400
+        except Exception:
+            close = True
+        finished = time.monotonic()
+
+        if close and connection is not None:
+            connection[1].close()
+            connection = None
+        if began >= start_time:
+            samples.append((kind, finished - began, ok))
+
+    if connection is not None:
+        connection[1].close()
+
+def percentile(values, fraction):
+    """计算已排序列表的百分位数"""
+    if not values:
+        return None
+    index = min(len(values) - 1, max(0, int(round(fraction * len(values))) - 1))
+    return values[index]
+
+def summarize(samples, concurrency, duration):
+    """汇总一级并发的测试结果"""
+    latencies = sorted(latency for _, latency, _ in samples)
+    errors = sum(1 for _, _, ok in samples if not ok)
+
+    def ms(value):
+        return None if value is None else round(value * 1000, 3)
+
+    by_kind = {}
+    for kind in sorted({kind for kind, _, _ in samples}):
+        kind_latencies = sorted(latency for k, latency, _ in samples if k == kind)
+        by_kind[kind] = {
+            "requests": len(kind_latencies),
+            "errors": sum(1 for k, _, ok in samples if k == kind and not ok),
+            "p50_ms": ms(percentile(kind_latencies, 0.50)),
+            "p99_ms": ms(percentile(kind_latencies, 0.99))
+        }
+
+    return {
+        "concurrency": concurrency,
+        "requests": len(samples),
+        "errors": errors,
+        "error_rate": round(errors / len(samples), 6) if samples else 1.0,
+        "throughput": round(len(samples) / duration, 3),
+        "p50_ms": ms(percentile(latencies, 0.50)),
+        "p90_ms": ms(percentile(latencies, 0.90)),
+        "p99_ms": ms(percentile(latencies, 0.99)),
+        "max_ms": ms(latencies[-1] if latencies else None),
+        "by_kind": by_kind
+    }
+
+async def run_step(port, workload, concurrency, duration, warmup, timeout):
+    """以指定并发运行一级测试"""
+    samples = []
+    start_time = time.monotonic() + warmup
+    end_time = start_time + duration
+    await asyncio.gather(*[
+        client(port, workload, start_time, end_time, timeout, samples)
+        for _ in range(concurrency)
+    ])
+    return summarize(samples, concurrency, duration)
+
+def run_ramp(args, port, workload):
+    """逐级提高并发，直到吞吐量不再提升或错误率超限
+
+    Returns:
+        tuple: (各级结果, 饱和点结果)
+    """
+    levels = [int(level) for level in args.concurrency.split(",") if level.strip()]
+    steps = []
+    best = None
+    stalled = 0
+
+    for concurrency in levels:
+        step = asyncio.run(run_step(port, workload, concurrency, args.duration,
+                                    args.warmup, args.timeout))
+        steps.append(step)
+        print(f"并发 {concurrency:>4}: {step['throughput']:>9.1f} 请求/秒, "
+              f"错误率 {step['error_rate']:.2%}, p50 {step['p50_ms']}ms, "
+              f"p99 {step['p99_ms']}ms")
+
+        if step["error_rate"] > args.max_error_rate:
+            print("错误率超过上限，停止加压")
+            break
+
+        if best is None or step["throughput"] > best["throughput"] * (1 + args.min_gain):
+            best = step
+            stalled = 0
+        else:
+            stalled += 1
+            if stalled >= args.patience:
+                print("吞吐量不再明显提升，停止加压")
+                break
+
+    return steps, best
+
+def check_regression(report, args):
+    """检查报告是否满足阈值和基线要求
+
+    Returns:
+        list: 未通过的检查项描述
+    """
+    failures = []
+    saturation = report["saturation"]
+    if saturation is None:
+        return ["没有得到有效的测试结果"]
+
+    if args.min_throughput is not None and saturation["throughput"] < args.min_throughput:
+        failures.append(f"吞吐量 {saturation['throughput']} 低于下限 {args.min_throughput}")
+    if args.max_p99 is not None and saturation["p99_ms"] > args.max_p99:
+        failures.append(f"p99延迟 {saturation['p99_ms']}ms 高于上限 {args.max_p99}ms")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f).get("saturation")
+        if baseline:
+            if saturation["throughput"] < baseline["throughput"] * (1 - args.tolerance):
+                failures.append(f"吞吐量 {saturation['throughput']} 低于基线 {baseline['throughput']}")
+            if saturation["p99_ms"] > baseline["p99_ms"] * (1 + args.tolerance):
+                failures.append(f"p99延迟 {saturation['p99_ms']}ms 高于基线 {baseline['p99_ms']}ms")
+
+    return failures
+
+def main():
+    """主函数"""
+    args = parse_arguments()
+    profiles = parse_weights(args.profiles)
+    mix = parse_weights(args.mix)
+
+    workspace, module_names = create_workspace(args.modules, profiles)
+    port = args.port or find_free_port()
+    print(f"工作目录: {workspace}")
+    print(f"已生成 {len(module_names)} 个模拟模块，服务器端口: {port}")
+
+    process = start_server(workspace, port)
+    try:
+        wait_for_server(port, process)
+        workload = Workload(mix, module_names, args.seed)
+        steps, saturation = run_ramp(args, port, workload)
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        if not args.keep_workspace:
+            shutil.rmtree(workspace, ignore_errors=True)
+
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count()
+        },
+        "config": {
+            "modules": args.modules,
+            "profiles": dict(profiles),
+            "mix": dict(mix),
+            "duration": args.duration,
+            "warmup": args.warmup
+        },
+        "steps": steps,
+        "saturation": saturation
+    }
+    report["failures"] = check_regression(report, args)
+
+    if saturation:
+        print(f"\n饱和点: 并发 {saturation['concurrency']}, "
+              f"{saturation['throughput']} 请求/秒, p99 {saturation['p99_ms']}ms")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=4)
+        print(f"报告已保存: {args.output}")
+
+    if report["failures"]:
+        print("\n性能检查未通过:")
+        for failure in report["failures"]:
+            print(f"  - {failure}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())